@@ -0,0 +1,211 @@
+"""Columnar storage for recorded player actions.
+
+Recordings are keyframes. A straight walk at constant speed is stored as one
+entry: where and when it started, its direction, and how many ticks it
+lasted (its span). The positions in between are reconstructed exactly from
+the player's speed. A new keyframe starts only on a direction change, a stop,
+a blocked or clamped step, or an interaction, so a loop of straight walking
+takes a handful of entries instead of one per tick. Once a loop is over,
+`compacted` also folds runs of keyframes that go nowhere, such as pushing
+against the edge of the world, into single HOLD keyframes.
+
+A keyframe is one entry in each of six typed arrays instead of an object,
+10 bytes in all. Echoes never copy a log: they hold an `ActionLogView`, a
+read-only window onto the first N keyframes of a log, so creating one is O(1).
+"""
+from array import array
+from typing import Tuple
+
+# Action type codes
+MOVE = 0
+INTERACT = 1
+HOLD = 2  # Standing in place for the keyframe's span, facing its direction
+ACTION_TYPES = {"move": MOVE, "interact": INTERACT, "hold": HOLD}
+
+# Unit step per direction code, in the order of simulation.Direction
+DIRECTION_STEPS = ((0, 0), (0, -1), (0, 1), (-1, 0), (1, 0))
+
+# Array typecodes. Ticks are loop-relative so 16 bits covers loops of up to
+# ~18 minutes at 60 ticks/s, and positions fit in a signed 16-bit pixel
+# coordinate.
+TICK_TYPECODE = "H"
+POSITION_TYPECODE = "h"
+CODE_TYPECODE = "b"
+
+def keyframe_position(x: int, y: int, direction: int, action_type: int, steps: int, speed: int) -> Tuple[int, int]:
+    """Position `steps` ticks into a keyframe that started at (x, y)"""
+    if action_type != MOVE or steps <= 0:
+        return x, y
+    dx, dy = DIRECTION_STEPS[direction]
+    return x + dx * speed * steps, y + dy * speed * steps
+
+# Action Log class
+class ActionLog:
+    """Append-only recording of one loop's actions.
+
+    Only the span of the last keyframe changes after it is written, and views
+    pin the span they saw, so what a view covers never changes.
+    """
+
+    __slots__ = ("ticks", "xs", "ys", "directions", "types", "spans", "speed")
+
+    def __init__(self, speed: int = 5):
+        self.ticks = array(TICK_TYPECODE)
+        self.xs = array(POSITION_TYPECODE)
+        self.ys = array(POSITION_TYPECODE)
+        self.directions = array(CODE_TYPECODE)
+        self.types = array(CODE_TYPECODE)
+        self.spans = array(TICK_TYPECODE)  # ticks covered by each keyframe
+        self.speed = speed  # pixels per tick of a recorded move
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    def append(self, action_type: int, x: int, y: int, tick: int, direction: int):
+        # A move on the very next tick that lands where the running walk
+        # predicts just extends the last keyframe
+        if action_type == MOVE and self.ticks and self.types[-1] == MOVE and self.directions[-1] == direction:
+            span = self.spans[-1]
+            if tick == self.ticks[-1] + span and (x, y) == keyframe_position(
+                    self.xs[-1], self.ys[-1], direction, MOVE, span, self.speed):
+                self.spans[-1] = span + 1
+                return
+
+        self.ticks.append(tick)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.directions.append(direction)
+        self.types.append(action_type)
+        self.spans.append(1)
+
+    def view(self) -> "ActionLogView":
+        """Freeze the keyframes recorded so far into a shared read-only view"""
+        return ActionLogView(self, len(self.ticks), self.spans[-1] if self.spans else 0)
+
+    def fork(self, length: int, last_span: int) -> "ActionLog":
+        """A new log with this log's first `length` keyframes, the last one cut to `last_span`.
+
+        Used when going back in time: the original stays intact for anything
+        still viewing its later entries.
+        """
+        log = ActionLog(self.speed)
+        log.ticks = self.ticks[:length]
+        log.xs = self.xs[:length]
+        log.ys = self.ys[:length]
+        log.directions = self.directions[:length]
+        log.types = self.types[:length]
+        log.spans = self.spans[:length]
+        if length:
+            log.spans[-1] = last_span
+        return log
+
+    def is_still(self, index: int) -> bool:
+        """Whether keyframe `index` keeps the player in one place for its whole span"""
+        action_type = self.types[index]
+        return action_type == HOLD or (action_type == MOVE and self.spans[index] == 1)
+
+    def compacted(self) -> "ActionLog":
+        """This recording with every stationary stretch folded into one HOLD keyframe.
+
+        Still keyframes that carry on exactly where and when the previous
+        still keyframe left off, facing the same way, are merged, so the
+        position and direction at every tick stay the same. Returns the log
+        itself when there is nothing to fold.
+        """
+        count = len(self.ticks)
+        if not any(self.continues_still(index) for index in range(1, count)):
+            return self
+
+        log = ActionLog(self.speed)
+        for index in range(count):
+            if index and self.continues_still(index) and log.is_still(len(log) - 1):
+                log.types[-1] = HOLD
+                log.spans[-1] += self.spans[index]
+                continue
+            log.ticks.append(self.ticks[index])
+            log.xs.append(self.xs[index])
+            log.ys.append(self.ys[index])
+            log.directions.append(self.directions[index])
+            log.types.append(self.types[index])
+            log.spans.append(self.spans[index])
+        return log
+
+    def continues_still(self, index: int) -> bool:
+        """Whether keyframe `index` is still and picks up where a still keyframe before it ends"""
+        previous = index - 1
+        return (self.is_still(index) and self.is_still(previous)
+                and self.ticks[index] == self.ticks[previous] + self.spans[previous]
+                and self.xs[index] == self.xs[previous] and self.ys[index] == self.ys[previous]
+                and self.directions[index] == self.directions[previous])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in
+                   (self.ticks, self.xs, self.ys, self.directions, self.types, self.spans))
+
+# Action Log View class
+class ActionLogView:
+    """Read-only window onto the first `length` keyframes of an ActionLog.
+
+    The log is append-only apart from the last keyframe's span, which the view
+    pins, so keyframes inside the window never change even if the owner keeps
+    recording after the view was taken.
+    """
+
+    __slots__ = ("_log", "_length", "_last_span")
+
+    def __init__(self, log: ActionLog, length: int, last_span: int):
+        self._log = log
+        self._length = length
+        self._last_span = last_span
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def speed(self) -> int:
+        return self._log.speed
+
+    def tick(self, index: int) -> int:
+        return self._log.ticks[index]
+
+    def position(self, index: int):
+        """Where keyframe `index` starts"""
+        return self._log.xs[index], self._log.ys[index]
+
+    def direction(self, index: int) -> int:
+        return self._log.directions[index]
+
+    def action_type(self, index: int) -> int:
+        return self._log.types[index]
+
+    def span(self, index: int) -> int:
+        return self._last_span if index == self._length - 1 else self._log.spans[index]
+
+    def resume(self) -> ActionLog:
+        """A log to keep recording into from the end of this view.
+
+        That is the viewed log itself while nothing was recorded past the
+        view, and a fork of it otherwise.
+        """
+        log = self._log
+        if len(log) == self._length and (not self._length or log.spans[-1] == self._last_span):
+            return log
+        return log.fork(self._length, self._last_span)
+
+    def columns(self):
+        """Return (ticks, xs, ys, directions, types, spans) sliced to the view.
+
+        The slices are copies, so callers may keep or mutate them freely.
+        """
+        log, n = self._log, self._length
+        spans = log.spans[:n]
+        if n:
+            spans[-1] = self._last_span
+        return log.ticks[:n], log.xs[:n], log.ys[:n], log.directions[:n], log.types[:n], spans
+
+    @property
+    def nbytes(self) -> int:
+        log = self._log
+        return self._length * sum(column.itemsize for column in
+                                  (log.ticks, log.xs, log.ys, log.directions, log.types, log.spans))
@@ -0,0 +1,89 @@
+"""Background loading of sounds and fonts.
+
+Nothing here blocks the first frame. Each asset is loaded on a worker thread
+and handed out as a `Future`, so the window opens straight away and callers
+decide whether to wait for an asset or get by without it until it is ready:
+sounds are simply skipped while they load, text waits only on screens that
+cannot be drawn without it.
+
+The audio mixer is opened on the worker the first time a sound file actually
+needs it, so a game without sound files never touches the audio device. How
+long each asset took to load is kept in `timings`.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+SOUND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sounds")
+
+# Asset Loader class
+class AssetLoader:
+    def __init__(self, sound_dir: str = SOUND_DIR):
+        self.sound_dir = sound_dir
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset-loader")
+        self.assets: Dict[str, Future] = {}
+        self.timings: Dict[str, float] = {}  # asset name -> seconds spent loading it
+        self.mixer_lock = threading.Lock()
+
+    def submit(self, name: str, load, *args) -> Future:
+        """Load an asset in the background; asking twice for a name returns the same future"""
+        future = self.assets.get(name)
+        if future is None:
+            future = self.assets[name] = self.executor.submit(self.timed, name, load, *args)
+        return future
+
+    def timed(self, name: str, load, *args):
+        start = time.perf_counter()
+        try:
+            return load(*args)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def sound(self, name: str) -> Future:
+        """`sounds/<name>.wav`, resolving to None if it is missing or audio is unavailable"""
+        return self.submit(f"sound:{name}", self.load_sound, os.path.join(self.sound_dir, f"{name}.wav"))
+
+    def font(self, size: int, name: Optional[str] = None) -> Future:
+        return self.submit(f"font:{name or 'default'}:{size}", load_font, name, size)
+
+    def get(self, future: Future):
+        """The asset if it has finished loading, otherwise None"""
+        return future.result() if future.done() else None
+
+    def load_sound(self, path: str) -> Optional["pygame.mixer.Sound"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            if not self.ensure_mixer():
+                return None
+            return pygame.mixer.Sound(path)
+        except pygame.error as error:
+            print(f"Warning: could not load {path}: {error}. Continuing without it.")
+            return None
+
+    def ensure_mixer(self) -> bool:
+        """Open the audio device on first use; False if there is none"""
+        with self.mixer_lock:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            return bool(pygame.mixer.get_init())
+
+    def report(self) -> List[Tuple[str, float]]:
+        """(asset, seconds) for every asset loaded so far, slowest first"""
+        return sorted(self.timings.items(), key=lambda item: item[1], reverse=True)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+def load_font(name: Optional[str], size: int) -> "pygame.font.Font":
+    # The default font ships with pygame; only named fonts need SysFont's
+    # scan of the installed system fonts
+    if not pygame.font.get_init():
+        pygame.font.init()
+    if name is None:
+        return pygame.font.Font(None, size)
+    return pygame.font.SysFont(name, size)
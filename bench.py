@@ -0,0 +1,256 @@
+"""Headless benchmarks for Echoes of Code.
+
+Drives scripted input sequences through the simulation and the renderer and
+reports simulation ticks/sec, rendering frames/sec, and how both scale with
+the number of echoes and the size of the level. Rendering uses pygame's dummy
+video driver, so no window or audio device is needed.
+
+    python bench.py                      # full run, writes bench_results.json
+    python bench.py --quick              # smaller sweep for a fast check
+    python bench.py --baseline old.json  # also print the change against an older run
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Must be set before pygame creates a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from simulation import TILE_SIZE, Direction, Level, Simulation
+from level_loader import LevelManager
+
+MOVES = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+
+# Effectively unlimited loops, so long benchmark runs never hit game over
+UNLIMITED_LOOPS = 10 ** 9
+
+def scripted_inputs(seed: int, ticks: int, interact_chance: float = 0.01) -> List[Tuple[Direction, bool]]:
+    """A reproducible random walk that holds each direction for a while"""
+    rng = random.Random(seed)
+    inputs = []
+    while len(inputs) < ticks:
+        direction = rng.choice(MOVES + [Direction.NONE])
+        for _ in range(rng.randint(5, 30)):
+            inputs.append((direction, rng.random() < interact_chance))
+    return inputs[:ticks]
+
+def make_stress_level(width: int, height: int, seed: int = 0, wall_density: float = 0.15,
+                      trigger_pairs: Optional[int] = None) -> Level:
+    """Generate a level of width x height tiles full of walls, plates and gates.
+
+    The level has no exit, so a benchmark can run on it indefinitely.
+    """
+    rng = random.Random(seed)
+    if trigger_pairs is None:
+        trigger_pairs = max(1, width * height // 50)
+
+    pixel_width, pixel_height = width * TILE_SIZE, height * TILE_SIZE
+    level = Level(0, (TILE_SIZE, TILE_SIZE), UNLIMITED_LOOPS, pixel_width, pixel_height)
+
+    # Border
+    level.add_wall(0, 0, pixel_width, TILE_SIZE)
+    level.add_wall(0, pixel_height - TILE_SIZE, pixel_width, TILE_SIZE)
+    level.add_wall(0, 0, TILE_SIZE, pixel_height)
+    level.add_wall(pixel_width - TILE_SIZE, 0, TILE_SIZE, pixel_height)
+
+    # Interior tiles, keeping the start tile and its neighbours clear
+    free = [(tx, ty) for tx in range(1, width - 1) for ty in range(1, height - 1)
+            if tx > 2 or ty > 2]
+    rng.shuffle(free)
+    wall_count = int(len(free) * wall_density)
+    for tx, ty in free[:wall_count]:
+        level.add_wall(tx * TILE_SIZE, ty * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+    free = free[wall_count:]
+
+    for target_id in range(trigger_pairs):
+        if len(free) < 2:
+            break
+        (px, py), (gx, gy) = free.pop(), free.pop()
+        level.add_pressure_plate(px * TILE_SIZE, py * TILE_SIZE, target_id)
+        level.add_gate(gx * TILE_SIZE, gy * TILE_SIZE, TILE_SIZE, TILE_SIZE, target_id)
+
+    return level
+
+def simulation_with_echoes(level: Level, echoes: int, seed: int = 0, loop_ticks: int = 120) -> Simulation:
+    """A simulation of `level` that already holds `echoes` recorded loops"""
+    sim = Simulation(LevelManager.from_levels([level]))
+    sim.timer_manager.max_loops = UNLIMITED_LOOPS
+    for loop in range(echoes):
+        for direction, interact in scripted_inputs(seed + loop, loop_ticks):
+            sim.step(direction, interact)
+        sim.reset_loop()
+    return sim
+
+def drive(sim: Simulation, direction: Direction, interact: bool):
+    """Step once, restarting the level if play stopped so every tick is real work"""
+    if sim.state != "playing":
+        sim.reset_game()
+        sim.state = "playing"
+    sim.step(direction, interact)
+
+def measure_ticks(sim: Simulation, inputs: List[Tuple[Direction, bool]], repeat: int) -> float:
+    """Best-of-`repeat` simulation ticks per second"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for direction, interact in inputs:
+            drive(sim, direction, interact)
+        best = min(best, time.perf_counter() - start)
+    return len(inputs) / best
+
+def measure_frames(game, inputs: List[Tuple[Direction, bool]]) -> float:
+    """Frames per second spent in Game.draw, with simulation time excluded"""
+    elapsed = 0.0
+    for direction, interact in inputs:
+        drive(game.sim, direction, interact)
+        start = time.perf_counter()
+        game.draw()
+        elapsed += time.perf_counter() - start
+    return len(inputs) / elapsed
+
+# Benchmark Runner class
+class BenchmarkRunner:
+    def __init__(self, quick: bool = False, seed: int = 0):
+        self.quick = quick
+        self.seed = seed
+        self.ticks = 300 if quick else 1200
+        self.repeat = 1 if quick else 3
+        self.game = None
+
+    def make_game(self, sim: Simulation):
+        # One window for the whole run; later benchmarks swap the simulation
+        if self.game is None:
+            from echoes_of_code import Game
+            self.game = Game(sim)
+        else:
+            self.game.sim = sim
+            self.game.background.invalidate()
+            self.game.full_redraw = True
+        return self.game
+
+    def bench_levels(self) -> List[Dict]:
+        results = []
+        for index in range(LevelManager().level_count):
+            manager = LevelManager()
+            manager.current_level_index = index
+            inputs = scripted_inputs(self.seed, self.ticks)
+            sim = Simulation(manager)
+            ticks_per_sec = measure_ticks(sim, inputs, self.repeat)
+            sim = Simulation(manager)
+            frames_per_sec = measure_frames(self.make_game(sim), inputs)
+            results.append({"level": manager.get_current_level().level_number,
+                            "ticks_per_sec": ticks_per_sec, "frames_per_sec": frames_per_sec})
+        return results
+
+    def bench_echo_scaling(self) -> List[Dict]:
+        counts = [1, 10, 50] if self.quick else [1, 10, 50, 100, 250, 500]
+        results = []
+        for count in counts:
+            level = make_stress_level(20, 15, self.seed)
+            inputs = scripted_inputs(self.seed, self.ticks)
+            sim = simulation_with_echoes(level, count, self.seed)
+            ticks_per_sec = measure_ticks(sim, inputs, self.repeat)
+            frames_per_sec = measure_frames(self.make_game(sim), inputs)
+            results.append({"echoes": count, "bytes_per_echo": sim.recording_stats()["bytes_per_echo"],
+                            "ticks_per_sec": ticks_per_sec, "frames_per_sec": frames_per_sec})
+        return results
+
+    def bench_level_scaling(self) -> List[Dict]:
+        sizes = [20, 50] if self.quick else [20, 50, 100, 200]
+        results = []
+        for size in sizes:
+            level = make_stress_level(size, size, self.seed)
+            inputs = scripted_inputs(self.seed, self.ticks)
+            sim = simulation_with_echoes(level, 10, self.seed)
+            ticks_per_sec = measure_ticks(sim, inputs, self.repeat)
+            frames_per_sec = measure_frames(self.make_game(sim), inputs)
+            results.append({"tiles": size * size, "walls": len(level.walls), "gates": len(level.gates),
+                            "ticks_per_sec": ticks_per_sec, "frames_per_sec": frames_per_sec})
+        return results
+
+    def bench_trigger_density(self) -> List[Dict]:
+        """Many plates and many echoes at once, where per-tick trigger checks dominate"""
+        cases = [(10, 50), (60, 50)] if self.quick else [(10, 50), (60, 50), (10, 250), (60, 250)]
+        results = []
+        for plates, count in cases:
+            level = make_stress_level(20, 15, self.seed, trigger_pairs=plates)
+            inputs = scripted_inputs(self.seed, self.ticks)
+            sim = simulation_with_echoes(level, count, self.seed)
+            # "case" comes first so it labels the row in flattened results
+            results.append({"case": f"{plates}p{count}e", "plates": len(level.pressure_plates), "echoes": count,
+                            "ticks_per_sec": measure_ticks(sim, inputs, self.repeat)})
+        return results
+
+    def run(self) -> Dict:
+        return {
+            "meta": run_metadata(self.quick, self.seed),
+            "levels": self.bench_levels(),
+            "echo_scaling": self.bench_echo_scaling(),
+            "level_scaling": self.bench_level_scaling(),
+            "trigger_density": self.bench_trigger_density(),
+        }
+
+def run_metadata(quick: bool, seed: int) -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": quick,
+        "seed": seed,
+    }
+
+def flatten(results: Dict) -> Dict[str, float]:
+    """Map every rate in a results file to a stable key like 'echo_scaling/echoes=50/ticks_per_sec'"""
+    flat = {}
+    for section, rows in results.items():
+        if section == "meta":
+            continue
+        for row in rows:
+            label = next(f"{key}={value}" for key, value in row.items() if not key.endswith("_per_sec"))
+            for key, value in row.items():
+                if key.endswith("_per_sec"):
+                    flat[f"{section}/{label}/{key}"] = value
+    return flat
+
+def print_results(results: Dict, baseline: Optional[Dict] = None):
+    current = flatten(results)
+    previous = flatten(baseline) if baseline else {}
+    for key, value in current.items():
+        line = f"{key:55s} {value:12.1f}"
+        if key in previous and previous[key]:
+            line += f"  ({(value / previous[key] - 1) * 100:+.1f}%)"
+        print(line)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Headless Echoes of Code benchmarks")
+    parser.add_argument("--quick", action="store_true", help="run a smaller sweep")
+    parser.add_argument("--seed", type=int, default=0, help="seed for scripted inputs and stress levels")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = BenchmarkRunner(args.quick, args.seed).run()
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Scrolling camera.
+
+The world (a level's width x height in pixels) can be any size; the camera
+picks the screen-sized window of it that is shown. It follows the player and
+stops at the level's edges, and a level no larger than the screen is drawn
+from its top-left corner exactly as before.
+"""
+from typing import Tuple
+
+from simulation import rects_overlap
+
+# Camera class
+class Camera:
+    def __init__(self, width: int, height: int):
+        self.width = width  # viewport size in pixels
+        self.height = height
+        self.x = 0  # world position of the viewport's top-left corner
+        self.y = 0
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        return self.x, self.y
+
+    def follow(self, target, world_width: int, world_height: int) -> bool:
+        """Center on `target` without showing anything past the world's edges.
+
+        Returns True if the camera moved.
+        """
+        x = clamp(target.x + target.width // 2 - self.width // 2, world_width - self.width)
+        y = clamp(target.y + target.height // 2 - self.height // 2, world_height - self.height)
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+        return moved
+
+    def sees(self, obj) -> bool:
+        return rects_overlap(self.x, self.y, self.width, self.height, obj.x, obj.y, obj.width, obj.height)
+
+def clamp(position: int, limit: int) -> int:
+    """Clamp to [0, limit]; a world smaller than the viewport stays at 0"""
+    return max(0, min(position, limit))
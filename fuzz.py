@@ -0,0 +1,378 @@
+"""Random-rollout fuzzer for the game rules.
+
+Plays large numbers of random, target-seeking input sequences through the
+headless simulation (the same `Simulation.step` that `Game.update` drives) and
+checks invariants after every tick:
+
+    out_of_bounds   the player or an echo left the level
+    stuck_in_gate   the player overlaps a closed gate (e.g. it closed on them)
+    stuck_in_wall   the player overlaps a wall
+    softlock        the player cannot move in any direction
+    echo_desync     an echo is not where its loop's player was at that tick
+
+Rollouts are spread over a process pool. Each worker writes one fixed-width
+result row per rollout into a shared-memory buffer, so results never have to
+be pickled back. A rollout is a pure function of its level and seed, so the
+parent regenerates every failing input sequence and shrinks it to a minimal
+trace. The trace is written as JSON and can be replayed:
+
+    python fuzz.py --rollouts 10000 --out fuzz_failures
+    python fuzz.py --replay fuzz_failures/level1-stuck_in_gate-seed42.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from level_loader import LevelManager, load_level
+from simulation import DIRECTIONS, Direction, Gate, Level, Simulation
+
+Input = Tuple[Direction, bool]
+NO_INPUT: Input = (Direction.NONE, False)
+MOVES = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+MOVE_OFFSETS = {Direction.UP: (0, -1), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0), Direction.RIGHT: (1, 0)}
+
+# Failure codes, as stored in the result buffer
+OK = 0
+OUT_OF_BOUNDS = 1
+STUCK_IN_GATE = 2
+STUCK_IN_WALL = 3
+SOFTLOCK = 4
+ECHO_DESYNC = 5
+FAILURE_NAMES = ["ok", "out_of_bounds", "stuck_in_gate", "stuck_in_wall", "softlock", "echo_desync"]
+
+# How a rollout ended
+OUTCOMES = ["playing", "level_complete", "game_over"]
+
+RESULT_DTYPE = np.dtype([("failure", "u1"), ("outcome", "u1"), ("failure_tick", "<i4"), ("ticks", "<i4")])
+
+# Random Pilot class
+class RandomPilot:
+    """Random inputs that hold each direction for a while.
+
+    With probability `bias` a segment heads for a trigger, gate or the exit
+    instead of wandering, which is where the interesting rule interactions are.
+    """
+
+    def __init__(self, seed: int, level: Level, bias: float = 0.5, interact_chance: float = 0.05):
+        self.rng = random.Random(seed)
+        self.bias = bias
+        self.interact_chance = interact_chance
+        targets = level.get_interactive_objects() + level.gates + ([level.exit] if level.exit else [])
+        self.targets = [(obj.x, obj.y) for obj in targets]
+        self.remaining = 0
+        self.direction = Direction.NONE
+        self.target: Optional[Tuple[int, int]] = None
+
+    def next(self, player) -> Input:
+        rng = self.rng
+        if self.remaining == 0:
+            self.remaining = rng.randint(5, 40)
+            if self.targets and rng.random() < self.bias:
+                self.target = rng.choice(self.targets)
+            else:
+                self.target = None
+                self.direction = rng.choice(MOVES + [Direction.NONE])
+        self.remaining -= 1
+
+        direction = self.direction if self.target is None else toward(player, self.target)
+        return direction, rng.random() < self.interact_chance
+
+def toward(player, target: Tuple[int, int]) -> Direction:
+    dx, dy = target[0] - player.x, target[1] - player.y
+    if dx == 0 and dy == 0:
+        return Direction.NONE
+    if abs(dx) >= abs(dy):
+        return Direction.RIGHT if dx > 0 else Direction.LEFT
+    return Direction.DOWN if dy > 0 else Direction.UP
+
+# Invariant Checker class
+class InvariantChecker:
+    def __init__(self, sim: Simulation):
+        self.sim = sim
+        self.loops: List[List[Tuple[int, int]]] = []  # player position after each tick of finished loops
+        self.current: List[Tuple[int, int]] = []
+
+    def check(self, loop_tick: int, events: List[str]) -> int:
+        """Check the world after a step taken at `loop_tick`; returns a failure code"""
+        sim = self.sim
+        player = sim.player
+        if "loop_reset" in events:
+            # The step ended in a reset, so everyone is back at the start
+            self.loops.append(self.current)
+            self.current = []
+        else:
+            self.current.append((player.x, player.y))
+
+        level = sim.get_current_level()
+        for body in [player] + sim.echoes:
+            if not (0 <= body.x <= level.width - body.width and 0 <= body.y <= level.height - body.height):
+                return OUT_OF_BOUNDS
+
+        if "loop_reset" not in events:
+            for echo, recorded in zip(sim.echoes, self.loops):
+                if loop_tick < len(recorded) and (echo.x, echo.y) != recorded[loop_tick]:
+                    return ECHO_DESYNC
+
+        blockers = level.blockers
+        overlapping = blockers.find_overlapping(player.x, player.y, player.width, player.height)
+        if overlapping:
+            return STUCK_IN_GATE if any(isinstance(obj, Gate) for obj in overlapping) else STUCK_IN_WALL
+
+        for dx, dy in MOVE_OFFSETS.values():
+            x, y = player.x + dx * player.speed, player.y + dy * player.speed
+            if not blockers.any_overlapping(x, y, player.width, player.height):
+                return OK
+        return SOFTLOCK
+
+# Rollout class
+class Rollout:
+    def __init__(self, failure: int, failure_tick: int, outcome: str, inputs: List[Input]):
+        self.failure = failure
+        self.failure_tick = failure_tick  # index of the input that exposed the failure, or -1
+        self.outcome = outcome
+        self.inputs = inputs
+
+    @property
+    def ticks(self) -> int:
+        return len(self.inputs)
+
+def rollout(level: Level, seed: int = 0, bias: float = 0.5, inputs: Optional[Sequence[Input]] = None) -> Rollout:
+    """Play the level from the start with random inputs from `seed`, or with `inputs`"""
+    sim = Simulation(LevelManager.from_levels([level]))
+    checker = InvariantChecker(sim)
+    pilot = RandomPilot(seed, level, bias) if inputs is None else None
+    limit = level.max_loops * sim.timer_manager.loop_ticks if inputs is None else len(inputs)
+
+    played = []
+    for step in range(limit):
+        if sim.state != "playing":
+            break
+        entry = pilot.next(sim.player) if pilot is not None else inputs[step]
+        played.append(entry)
+        loop_tick = sim.timer_manager.get_loop_tick()
+        failure = checker.check(loop_tick, sim.step(*entry))
+        if failure != OK:
+            return Rollout(failure, step, sim.state, played)
+    return Rollout(OK, -1, sim.state, played)
+
+# Per-process level cache, since workers run many rollouts of the same levels
+_levels: Dict[str, Level] = {}
+
+def level_for(path: str) -> Level:
+    level = _levels.get(path)
+    if level is None:
+        level = _levels[path] = load_level(path)
+    return level
+
+def rollout_plan(index: int, level_paths: Sequence[str], seed: int) -> Tuple[str, int]:
+    """Level and seed of rollout number `index`"""
+    return level_paths[index % len(level_paths)], seed + index
+
+def run_batch(job):
+    """Worker: play rollouts [first, first + count) and write their rows into the shared buffer"""
+    shm_name, total, level_paths, first, count, seed, bias = job
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = np.ndarray(total, dtype=RESULT_DTYPE, buffer=shm.buf)
+        for index in range(first, first + count):
+            path, rollout_seed = rollout_plan(index, level_paths, seed)
+            result = rollout(level_for(path), rollout_seed, bias)
+            results[index] = (result.failure, OUTCOMES.index(result.outcome), result.failure_tick, result.ticks)
+        del results  # release the view before closing the mapping
+    finally:
+        shm.close()
+
+def run_rollouts(level_paths: Sequence[str], rollouts: int, seed: int = 0, bias: float = 0.5,
+                 workers: int = 1) -> np.ndarray:
+    """Play `rollouts` rollouts spread over the levels and return their result rows"""
+    shm = shared_memory.SharedMemory(create=True, size=max(1, rollouts * RESULT_DTYPE.itemsize))
+    try:
+        chunk = max(1, min(256, rollouts // (workers * 8)))
+        jobs = [(shm.name, rollouts, list(level_paths), first, min(chunk, rollouts - first), seed, bias)
+                for first in range(0, rollouts, chunk)]
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                list(pool.map(run_batch, jobs))
+        else:
+            for job in jobs:
+                run_batch(job)
+        view = np.ndarray(rollouts, dtype=RESULT_DTYPE, buffer=shm.buf)
+        results = view.copy()
+        del view
+        return results
+    finally:
+        shm.close()
+        shm.unlink()
+
+def to_runs(inputs: Sequence[Input]) -> List[List]:
+    """Run-length encode inputs as [input, count] pairs"""
+    runs = []
+    for entry in inputs:
+        if runs and runs[-1][0] == entry:
+            runs[-1][1] += 1
+        else:
+            runs.append([entry, 1])
+    return runs
+
+def from_runs(runs: Sequence[Sequence]) -> List[Input]:
+    return [entry for entry, count in runs for _ in range(count)]
+
+def minimize(level: Level, inputs: Sequence[Input], failure: int) -> Rollout:
+    """Shrink a failing input sequence while it still fails the same way.
+
+    Works on runs of identical inputs: blocks of runs, halving in size, are
+    replaced by idling for the same number of ticks, which keeps every later
+    input on the tick it had. The result is cut off at the failing tick.
+    """
+    result = rollout(level, inputs=inputs)
+    if result.failure != failure:
+        return result
+    runs = to_runs(result.inputs)
+
+    block = max(1, len(runs) // 2)
+    while True:
+        i = 0
+        while i < len(runs):
+            chosen = runs[i:i + block]
+            if all(entry == NO_INPUT for entry, _ in chosen):
+                i += block
+                continue
+            candidate = runs[:i] + [[NO_INPUT, sum(count for _, count in chosen)]] + runs[i + block:]
+            attempt = rollout(level, inputs=from_runs(candidate))
+            if attempt.failure == failure:
+                result = attempt
+                runs = to_runs(attempt.inputs)
+            else:
+                i += block
+        if block == 1:
+            break
+        block //= 2
+
+    # Interactions that don't matter are dropped one at a time
+    for i, (entry, count) in enumerate(runs):
+        if entry[1]:
+            candidate = runs[:i] + [[(entry[0], False), count]] + runs[i + 1:]
+            attempt = rollout(level, inputs=from_runs(candidate))
+            if attempt.failure == failure:
+                result, runs = attempt, candidate
+    return result
+
+def minimize_job(job) -> Tuple[str, int, int, Rollout]:
+    path, seed, bias, failure = job
+    level = level_for(path)
+    return path, seed, failure, minimize(level, rollout(level, seed, bias).inputs, failure)
+
+def write_trace(path: str, level_path: str, seed: int, result: Rollout):
+    # The level is stored relative to the trace, so a trace and the level it
+    # was found on can be moved together
+    try:
+        stored_path = os.path.relpath(level_path, os.path.dirname(os.path.abspath(path)))
+    except ValueError:
+        # On another drive than the trace
+        stored_path = os.path.abspath(level_path)
+    trace = {
+        "level": stored_path.replace(os.sep, "/"),
+        "level_number": level_for(level_path).level_number,
+        "seed": seed,
+        "failure": FAILURE_NAMES[result.failure],
+        "failure_tick": result.failure_tick,
+        "inputs": [[direction.value, int(interact), count] for (direction, interact), count in to_runs(result.inputs)],
+    }
+    with open(path, "w") as f:
+        json.dump(trace, f)
+
+def load_trace(path: str) -> Tuple[Dict, List[Input]]:
+    with open(path) as f:
+        trace = json.load(f)
+    inputs = from_runs([((DIRECTIONS[direction], bool(interact)), count) for direction, interact, count in trace["inputs"]])
+    return trace, inputs
+
+def trace_level_path(path: str, trace: Dict, level_dir: Optional[str] = None) -> str:
+    """The level a trace was recorded on: in `level_dir` if given, otherwise
+    where the trace says, falling back to the game's levels for traces that
+    only stored a file name"""
+    name = os.path.basename(trace["level"])
+    if level_dir is not None:
+        return os.path.join(level_dir, name)
+    stored = os.path.join(os.path.dirname(os.path.abspath(path)), trace["level"])
+    if os.path.exists(stored):
+        return stored
+    return os.path.join(os.path.dirname(LevelManager().level_paths[0]), name)
+
+def replay_trace(path: str, level_dir: Optional[str] = None) -> Rollout:
+    """Play a saved trace again"""
+    trace, inputs = load_trace(path)
+    return rollout(load_level(trace_level_path(path, trace, level_dir)), inputs=inputs)
+
+def report(level_paths: Sequence[str], results: np.ndarray, seed: int) -> Dict[Tuple[str, int], int]:
+    """Print per-level failure counts; returns the first failing seed of each (level, failure)"""
+    first_failures = {}
+    for index, row in enumerate(results):
+        if row["failure"] != OK:
+            path, rollout_seed = rollout_plan(index, level_paths, seed)
+            first_failures.setdefault((path, int(row["failure"])), rollout_seed)
+
+    levels = np.arange(len(results)) % len(level_paths)
+    for i, path in enumerate(level_paths):
+        rows = results[levels == i]
+        failures = {FAILURE_NAMES[code]: int(count) for code, count in
+                    zip(*np.unique(rows["failure"][rows["failure"] != OK], return_counts=True))}
+        completed = int((rows["outcome"] == OUTCOMES.index("level_complete")).sum())
+        print(f"{os.path.basename(path)}: {len(rows)} rollouts, {completed} completed, failures {failures or 'none'}")
+    return first_failures
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fuzz the game rules with random rollouts")
+    parser.add_argument("levels", nargs="*", help="level files (default: every file in levels/)")
+    parser.add_argument("--rollouts", type=int, default=1000, help="number of rollouts")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first rollout")
+    parser.add_argument("--bias", type=float, default=0.5, help="chance that a segment heads for an object")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--out", default="fuzz_failures", help="directory for minimized failure traces")
+    parser.add_argument("--replay", help="replay a saved trace instead of fuzzing")
+    parser.add_argument("--level-dir", help="with --replay, look for the trace's level file here")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        result = replay_trace(args.replay, args.level_dir)
+        print(f"{FAILURE_NAMES[result.failure]} at input {result.failure_tick} ({result.outcome})")
+        return 1 if result.failure != OK else 0
+
+    level_paths = args.levels or LevelManager().level_paths
+    start = time.perf_counter()
+    results = run_rollouts(level_paths, args.rollouts, args.seed, args.bias, args.workers)
+    elapsed = time.perf_counter() - start
+    ticks = int(results["ticks"].sum())
+    print(f"{args.rollouts} rollouts in {elapsed:.2f}s: {args.rollouts / elapsed:.1f} rollouts/sec, "
+          f"{ticks / elapsed:.0f} ticks/sec")
+
+    first_failures = report(level_paths, results, args.seed)
+    if not first_failures:
+        return 0
+
+    os.makedirs(args.out, exist_ok=True)
+    jobs = [(path, rollout_seed, args.bias, failure) for (path, failure), rollout_seed in first_failures.items()]
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers) as pool:
+            minimized = list(pool.map(minimize_job, jobs))
+    else:
+        minimized = [minimize_job(job) for job in jobs]
+
+    for path, rollout_seed, failure, result in minimized:
+        name = f"{os.path.splitext(os.path.basename(path))[0]}-{FAILURE_NAMES[failure]}-seed{rollout_seed}.json"
+        trace_path = os.path.join(args.out, name)
+        write_trace(trace_path, path, rollout_seed, result)
+        active = sum(1 for entry in result.inputs if entry != NO_INPUT)
+        print(f"  {name}: {len(result.inputs)} ticks, {active} non-idle inputs")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
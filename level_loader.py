@@ -0,0 +1,186 @@
+"""Data-driven levels.
+
+Levels are JSON files in `levels/`. The first time a file is loaded it is
+compiled into a cached binary form (a pickle in `levels/__pycache__`, checked
+against the source's mtime and size like a .pyc) holding the object tables,
+the collision grid buckets and the trigger -> gate tables, so later loads
+skip both JSON parsing and grid building. `LevelManager` loads levels only
+when they are first needed and can prefetch the next one on a worker thread.
+"""
+import json
+import os
+import pickle
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from glob import glob
+from typing import Dict, List, Optional
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, Level, Wall, Switch, PressurePlate, Gate, Terminal, Exit
+
+LEVEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels")
+CACHE_DIR_NAME = "__pycache__"
+COMPILED_VERSION = 2
+
+# Trigger kinds in the order their lists appear on a Level
+TRIGGER_KINDS = ("switches", "pressure_plates", "terminals")
+
+def parse_level(data: Dict) -> Level:
+    """Build a Level from the JSON level format"""
+    width, height = data.get("size", (SCREEN_WIDTH, SCREEN_HEIGHT))
+    level = Level(data["level_number"], tuple(data["player_start"]), data["max_loops"], width, height)
+    for x, y, width, height in data.get("walls", []):
+        level.add_wall(x, y, width, height)
+    for x, y, target_id in data.get("switches", []):
+        level.add_switch(x, y, target_id)
+    for x, y, target_id in data.get("pressure_plates", []):
+        level.add_pressure_plate(x, y, target_id)
+    for x, y, target_id in data.get("terminals", []):
+        level.add_terminal(x, y, target_id)
+    for x, y, width, height, gate_id in data.get("gates", []):
+        level.add_gate(x, y, width, height, gate_id)
+    if data.get("exit"):
+        level.set_exit(*data["exit"])
+    return level
+
+def compile_level(level: Level) -> Dict:
+    """Flatten a freshly loaded Level, including its lookup tables, into plain data"""
+    # Blockers are referenced by index: walls first, then gates
+    blocker_index = {id(obj): i for i, obj in enumerate(level.walls + level.gates)}
+    trigger_index = {}
+    for kind in TRIGGER_KINDS:
+        for i, trigger in enumerate(getattr(level, kind)):
+            trigger_index[id(trigger)] = (kind, i)
+    gate_index = {id(gate): i for i, gate in enumerate(level.gates)}
+
+    return {
+        "version": COMPILED_VERSION,
+        "level_number": level.level_number,
+        "player_start": level.player_start,
+        "max_loops": level.max_loops,
+        "size": (level.width, level.height),
+        "walls": [(w.x, w.y, w.width, w.height) for w in level.walls],
+        "switches": [(s.x, s.y, s.target_id) for s in level.switches],
+        "pressure_plates": [(p.x, p.y, p.target_id) for p in level.pressure_plates],
+        "terminals": [(t.x, t.y, t.target_id) for t in level.terminals],
+        "gates": [(g.x, g.y, g.width, g.height, g.gate_id) for g in level.gates],
+        "exit": (level.exit.x, level.exit.y) if level.exit else None,
+        "cell_size": level.blockers.cell_size,
+        "blocker_cells": {key: [blocker_index[id(obj)] for obj in bucket]
+                          for key, bucket in level.blockers.cells.items()},
+        "triggers_by_target": {target_id: [trigger_index[id(t)] for t in triggers]
+                               for target_id, triggers in level.triggers_by_target.items()},
+        "gates_by_target": {target_id: [gate_index[id(g)] for g in gates]
+                            for target_id, gates in level.gates_by_target.items()},
+    }
+
+def build_level(compiled: Dict) -> Level:
+    """Rebuild a Level from compiled data without re-deriving its tables"""
+    level = Level(compiled["level_number"], tuple(compiled["player_start"]), compiled["max_loops"], *compiled["size"])
+    level.walls = [Wall(*args) for args in compiled["walls"]]
+    level.switches = [Switch(*args) for args in compiled["switches"]]
+    level.pressure_plates = [PressurePlate(*args) for args in compiled["pressure_plates"]]
+    level.terminals = [Terminal(*args) for args in compiled["terminals"]]
+    level.gates = [Gate(*args) for args in compiled["gates"]]
+    if compiled["exit"]:
+        level.exit = Exit(*compiled["exit"])
+
+    for gate in level.gates:
+        gate.blockers = level.blockers
+    for kind in TRIGGER_KINDS:
+        for trigger in getattr(level, kind):
+            trigger.level = level
+
+    blockers = level.walls + level.gates
+    level.blockers.cells = {key: [blockers[i] for i in refs] for key, refs in compiled["blocker_cells"].items()}
+    level.triggers_by_target = {target_id: [getattr(level, kind)[i] for kind, i in refs]
+                                for target_id, refs in compiled["triggers_by_target"].items()}
+    level.gates_by_target = {target_id: [level.gates[i] for i in refs]
+                             for target_id, refs in compiled["gates_by_target"].items()}
+    return level
+
+def cache_path_for(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR_NAME, name + ".compiled")
+
+def load_level(path: str, use_cache: bool = True) -> Level:
+    """Load a level file, going through the compiled cache when it is fresh"""
+    stat = os.stat(path)
+    source = (stat.st_mtime_ns, stat.st_size)
+    cache_path = cache_path_for(path)
+
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                compiled = pickle.load(f)
+            if (compiled.get("version") == COMPILED_VERSION and compiled.get("source") == source
+                    and compiled.get("cell_size") == TILE_SIZE):
+                return build_level(compiled)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            pass
+
+    with open(path) as f:
+        level = parse_level(json.load(f))
+
+    if use_cache:
+        compiled = compile_level(level)
+        compiled["source"] = source
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # A read-only install just doesn't get a cache
+            pass
+
+    return level
+
+def natural_key(path: str) -> List:
+    """Sort level2 before level10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", os.path.basename(path))]
+
+# Level Manager class
+class LevelManager:
+    def __init__(self, level_dir: Optional[str] = LEVEL_DIR, prefetch: bool = False):
+        self.level_paths = sorted(glob(os.path.join(level_dir, "*.json")), key=natural_key) if level_dir else []
+        # Loaded on first use
+        self.levels: List[Optional[Level]] = [None] * len(self.level_paths)
+        self.current_level_index = 0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-prefetch") if prefetch else None
+        self.pending: Dict[int, Future] = {}
+        self.prefetch(1)
+
+    @classmethod
+    def from_levels(cls, levels: List[Level]) -> "LevelManager":
+        """A manager over levels that were built in code rather than loaded"""
+        manager = cls(level_dir=None)
+        manager.levels = list(levels)
+        return manager
+
+    @property
+    def level_count(self) -> int:
+        return len(self.levels)
+
+    def get_level(self, index: int) -> Level:
+        level = self.levels[index]
+        if level is None:
+            future = self.pending.pop(index, None)
+            level = future.result() if future is not None else load_level(self.level_paths[index])
+            self.levels[index] = level
+        return level
+
+    def prefetch(self, index: int):
+        """Start loading a level in the background, if prefetching is enabled"""
+        if self.executor is None or not 0 <= index < len(self.levels):
+            return
+        if self.levels[index] is None and index not in self.pending:
+            self.pending[index] = self.executor.submit(load_level, self.level_paths[index])
+
+    def get_current_level(self) -> Level:
+        return self.get_level(self.current_level_index)
+
+    def next_level(self) -> bool:
+        if self.current_level_index < len(self.levels) - 1:
+            self.current_level_index += 1
+            self.prefetch(self.current_level_index + 1)
+            return True
+        return False
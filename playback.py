@@ -0,0 +1,164 @@
+"""Batched echo playback.
+
+All echoes of a level live in one set of NumPy arrays. Each echo's keyframes
+are stored back to back under a sort key of (echo index, tick), so a single
+`searchsorted` call finds, for every echo at once, the latest keyframe at or
+before the current tick, and the position along it follows from its step and
+span. Positions are therefore resolved from the timeline rather than advanced
+one action per frame, and an echo that skipped ticks lands exactly where its
+recording says it should be. An echo that has made its last move is static
+for the rest of the loop and is no longer looked up at all.
+
+Interactions are not replayed here: `timeline.TriggerTimeline` compiles each
+echo's interactions and plate visits into a schedule once its loop is over.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from actionlog import ActionLogView, DIRECTION_STEPS, MOVE, INTERACT
+
+# Keys are (echo index << TICK_BITS) | tick; ticks are 16-bit in the action log
+TICK_BITS = 16
+MAX_TICK = (1 << TICK_BITS) - 1
+
+STEPS = np.array(DIRECTION_STEPS, dtype=np.int32)
+
+# Echo Playback class
+class EchoPlayback:
+    def __init__(self):
+        self.count = 0
+
+        # Concatenated keyframe timelines of every echo. Each echo's timeline
+        # opens with a still keyframe at its start, so every lookup lands on one.
+        self.keys = np.empty(0, dtype=np.int64)
+        self.ticks = np.empty(0, dtype=np.int64)
+        self.positions = np.empty((0, 2), dtype=np.int32)  # where each keyframe starts
+        self.steps = np.empty((0, 2), dtype=np.int32)  # pixels per tick along each keyframe
+        self.last_steps = np.empty(0, dtype=np.int64)  # span - 1
+        self.directions = np.empty(0, dtype=np.int8)
+        self.interacts = np.empty(0, dtype=bool)
+
+        # Per-echo data
+        self.echo_keys = np.empty(0, dtype=np.int64)  # echo index << TICK_BITS
+        self.starts = np.empty((0, 2), dtype=np.int32)
+        # Echoes ordered by the loop tick from which they stay put
+        self.settle_ticks = np.empty(0, dtype=np.int64)
+        self.settle_order = np.empty(0, dtype=np.int64)
+        self.settle_sorted = np.empty(0, dtype=np.int64)
+
+        self.rewind()
+
+    def add(self, actions: ActionLogView, start: Tuple[int, int]) -> int:
+        """Add an echo's finished recording and return its index"""
+        ticks, xs, ys, directions, types, spans = (np.frombuffer(column, dtype=column.typecode)
+                                                   for column in actions.columns())
+        return self.add_columns(ticks, xs, ys, directions, types, spans, start, actions.speed)
+
+    def add_columns(self, ticks: np.ndarray, xs: np.ndarray, ys: np.ndarray, directions: np.ndarray,
+                    types: np.ndarray, spans: np.ndarray, start: Tuple[int, int], speed: int) -> int:
+        """Add an echo from raw keyframe columns, e.g. decoded straight from a replay file"""
+        index = self.count
+        ticks = ticks.astype(np.int64)
+        xs = xs.astype(np.int32)
+        ys = ys.astype(np.int32)
+        directions = directions.astype(np.int8)
+        speeds = (types == MOVE).astype(np.int32) * speed
+
+        # The start keyframe sorts before any real keyframe at tick 0
+        key = index << TICK_BITS
+        self.keys = np.concatenate((self.keys, [key], key | ticks))
+        self.ticks = np.concatenate((self.ticks, [0], ticks))
+        self.positions = np.concatenate((self.positions, np.array([start], dtype=np.int32),
+                                         np.stack((xs, ys), axis=1)))
+        self.steps = np.concatenate((self.steps, np.zeros((1, 2), dtype=np.int32), STEPS[directions] * speeds[:, None]))
+        self.last_steps = np.concatenate((self.last_steps, [0], spans.astype(np.int64) - 1))
+        self.directions = np.concatenate((self.directions, np.zeros(1, dtype=np.int8), directions))
+        self.interacts = np.concatenate((self.interacts, [False], types == INTERACT))
+
+        self.echo_keys = np.append(self.echo_keys, key)
+        self.starts = np.concatenate((self.starts, np.array([start], dtype=np.int32)))
+
+        self.count += 1
+        self.settle_ticks = np.append(self.settle_ticks, self.settle_tick(index))
+        self.settle_order = np.argsort(self.settle_ticks, kind="stable")
+        self.settle_sorted = self.settle_ticks[self.settle_order]
+        self.rewind()
+        return index
+
+    def rewind(self):
+        """Put every echo back at its start for a new loop"""
+        self.x = self.starts[:, 0].copy()
+        self.y = self.starts[:, 1].copy()
+        self.direction = np.zeros(self.count, dtype=np.int8)
+        # Echoes settle_order[:static_count] are at their final positions
+        self.static_count = 0
+
+    def state(self) -> Tuple:
+        """The recorded timelines, for a snapshot.
+
+        Adding an echo builds new arrays instead of growing the old ones, so
+        the arrays can be shared with a snapshot without copying.
+        """
+        return (self.count, self.keys, self.ticks, self.positions, self.steps, self.last_steps, self.directions,
+                self.interacts, self.echo_keys, self.starts, self.settle_ticks, self.settle_order, self.settle_sorted)
+
+    def restore(self, state: Tuple, loop_tick: int):
+        """Go back to the timelines of `state`, positioned as if `loop_tick` was the last update"""
+        (self.count, self.keys, self.ticks, self.positions, self.steps, self.last_steps, self.directions,
+         self.interacts, self.echo_keys, self.starts, self.settle_ticks, self.settle_order, self.settle_sorted) = state
+        self.rewind()
+        if loop_tick >= 0:
+            self.locate(loop_tick)
+
+    def locate(self, loop_tick: int) -> np.ndarray:
+        """Move every echo to where its recording puts it at `loop_tick`.
+
+        Ticks only go forward between rewinds. Returns the indices of the
+        echoes that were looked up; the static ones already stand where they
+        will stay.
+        """
+        tick = min(loop_tick, MAX_TICK)
+        moving = self.settle_order[self.static_count:]
+        self.static_count = int(np.searchsorted(self.settle_sorted, tick, side="right"))
+        if len(moving) == 0:
+            return moving
+        latest = np.searchsorted(self.keys, self.echo_keys[moving] | tick, side="right") - 1
+        # Ticks walked along the latest keyframe
+        walked = np.minimum(tick - self.ticks[latest], self.last_steps[latest])
+        positions = self.positions[latest] + self.steps[latest] * walked[:, None]
+        self.x[moving] = positions[:, 0]
+        self.y[moving] = positions[:, 1]
+        self.direction[moving] = self.directions[latest]
+        return moving
+
+    def static_echoes(self) -> np.ndarray:
+        """Indices of the echoes that will not move again this loop, in the order they settled"""
+        return self.settle_order[:self.static_count]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.state()[1:])
+
+    def keyframes(self, index: int) -> slice:
+        """Where echo `index`'s keyframes sit in the arrays, its start keyframe included"""
+        key = index << TICK_BITS
+        return slice(int(np.searchsorted(self.keys, key)), int(np.searchsorted(self.keys, key + (1 << TICK_BITS))))
+
+    def settle_tick(self, index: int) -> int:
+        """The loop tick from which echo `index` stays where it is"""
+        frames = self.keyframes(index)
+        return int((self.ticks[frames] + self.last_steps[frames]).max())
+
+    def trajectory(self, index: int, ticks: int) -> np.ndarray:
+        """(ticks, 2) positions of echo `index` at loop ticks 0 .. ticks - 1"""
+        loop_ticks = np.minimum(np.arange(ticks), MAX_TICK)
+        latest = np.searchsorted(self.keys, self.echo_keys[index] | loop_ticks, side="right") - 1
+        walked = np.minimum(loop_ticks - self.ticks[latest], self.last_steps[latest])
+        return self.positions[latest] + self.steps[latest] * walked[:, None]
+
+    def interactions(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ticks and (n, 2) positions of echo `index`'s recorded interactions"""
+        frames = self.keyframes(index)
+        interacts = self.interacts[frames]
+        return self.ticks[frames][interacts], self.positions[frames][interacts]
@@ -0,0 +1,97 @@
+"""Per-phase frame profiler.
+
+Code marks phases with `with profiler.phase("name"):`. While the profiler is
+enabled each phase's duration is kept in a rolling window for p50/p99
+statistics and appended to a Chrome trace-event log that can be opened in
+chrome://tracing or Perfetto. While disabled, `phase` hands back a shared
+no-op context, so instrumented code costs next to nothing.
+"""
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+# Phase class
+class Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+# Null Phase class
+class NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+NULL_PHASE = NullPhase()
+
+# Frame Profiler class
+class FrameProfiler:
+    def __init__(self, window: int = 240, max_trace_events: int = 200000):
+        self.enabled = False
+        self.window = window
+        self.samples: Dict[str, Deque[int]] = {}  # phase name -> recent durations in ns
+        self.order: List[str] = []  # phase names in first-seen order, for display
+        self.trace_events: Deque[Dict] = deque(maxlen=max_trace_events)
+        self.origin = time.perf_counter_ns()
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name)
+
+    def record(self, name: str, start: int, end: int):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+            self.order.append(name)
+        samples.append(end - start)
+
+        self.trace_events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,  # microseconds
+            "dur": (end - start) / 1000,
+            "pid": 0,
+            "tid": 0,
+        })
+
+    def percentiles(self, name: str) -> Tuple[float, float]:
+        """(p50, p99) of the recent durations of a phase, in milliseconds"""
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return 0.0, 0.0
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return p50 / 1e6, p99 / 1e6
+
+    def summary(self) -> List[Tuple[str, float, float]]:
+        return [(name, *self.percentiles(name)) for name in self.order]
+
+    def export_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": list(self.trace_events), "displayTimeUnit": "ms"}, f)
+
+    def reset(self):
+        self.samples.clear()
+        self.order.clear()
+        self.trace_events.clear()
@@ -0,0 +1,332 @@
+"""Rendering helpers for the pygame front end.
+
+Drawing functions for every entity type, plus the caches that keep per-frame
+work down: a pre-rendered view of the level background, with the echoes
+that have stopped moving drawn into it, that is only rebuilt when a trigger
+or gate changes state or the camera moves, dirty-rectangle
+tracking so only the regions touched by moving entities and the HUD are
+pushed to the display, and caches of pre-built translucent sprites and
+rendered text.
+
+Entities are not drawn primitive by primitive each frame. Every entity type
+and state is rasterized once by its draw function into a cached surface
+(`EntitySprites`), and a frame hands all of its blits to pygame in a single
+`Surface.blits` call, so drawing costs pixels rather than Python calls.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pygame
+
+from simulation import BLACK, WHITE, rects_overlap, Player, Echo, Wall, Switch, PressurePlate, Gate, Terminal, Exit, Level
+
+# Sprite Cache class
+class SpriteCache:
+    """Pre-built translucent rectangles keyed by (color, alpha, size).
+
+    Building a per-pixel-alpha surface is far more expensive than blitting
+    one, so anything translucent should fetch its surface from here instead
+    of allocating one per frame.
+    """
+
+    def __init__(self):
+        self.sprites: Dict[Tuple, pygame.Surface] = {}
+
+    def get(self, color: Tuple[int, int, int], alpha: int, size: Tuple[int, int]) -> pygame.Surface:
+        key = (tuple(color), alpha, tuple(size))
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface(size, pygame.SRCALPHA)
+            sprite.fill((*color, alpha))
+            # Match the display's pixel format once a window exists
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def warm(self, colors: Iterable[Tuple[int, int, int]], alpha: int, size: Tuple[int, int]):
+        """Build sprites ahead of time so the first frame that needs them doesn't stall"""
+        for color in colors:
+            self.get(color, alpha, size)
+
+    def clear(self):
+        self.sprites.clear()
+
+# Shared cache used by the draw functions below
+sprite_cache = SpriteCache()
+
+# Text Cache class
+class TextCache:
+    """Bounded LRU cache of rendered text for one font.
+
+    Strings that rarely change (labels, message screens) are cached whole.
+    Strings that change every frame, like the loop timer, are drawn with
+    `draw_glyphs`, which composes them from cached single-character surfaces
+    so that they never hit the font rasterizer once warmed up.
+    """
+
+    def __init__(self, font: pygame.font.Font, max_entries: int = 256):
+        self.font = font
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple, pygame.Surface]" = OrderedDict()
+
+    def render(self, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        key = (text, tuple(color))
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            return surface
+
+        surface = self.font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            # Evict the least recently used entry
+            self.entries.popitem(last=False)
+        return surface
+
+    def draw(self, screen, text: str, color: Tuple[int, int, int], position: Tuple[int, int]) -> pygame.Rect:
+        return screen.blit(self.render(text, color), position)
+
+    def draw_glyphs(self, screen, text: str, color: Tuple[int, int, int], position: Tuple[int, int]) -> pygame.Rect:
+        """Draw text one cached glyph at a time and return the area covered"""
+        x, y = position
+        area = pygame.Rect(x, y, 0, 0)
+        sequence = []
+        for char in text:
+            glyph = self.render(char, color)
+            sequence.append((glyph, (x, y)))
+            x += glyph.get_width()
+        # One call for the whole string
+        area.unionall_ip(screen.blits(sequence))
+        return area
+
+    def clear(self):
+        self.entries.clear()
+
+# Drawing functions, one per entity type. The simulation classes carry no
+# pygame code, so everything visual lives here. `origin` is the world
+# position of the screen's top-left corner (the camera position).
+def draw_player(screen, player: Player, origin: Tuple[int, int] = (0, 0)) -> pygame.Rect:
+    """Draw a player or echo and return the screen area it covered"""
+    x, y = player.x - origin[0], player.y - origin[1]
+    if player.is_echo:
+        sprite = sprite_cache.get(player.color, player.alpha, (player.width, player.height))
+        return screen.blit(sprite, (x, y))
+    else:
+        return pygame.draw.rect(screen, player.color, (x, y, player.width, player.height))
+
+def draw_wall(screen, wall: Wall, origin: Tuple[int, int] = (0, 0)):
+    pygame.draw.rect(screen, wall.color, (wall.x - origin[0], wall.y - origin[1], wall.width, wall.height))
+
+def draw_switch(screen, switch: Switch, origin: Tuple[int, int] = (0, 0)):
+    x, y = switch.x - origin[0], switch.y - origin[1]
+    color = switch.color_active if switch.is_active else switch.color_inactive
+    pygame.draw.rect(screen, color, (x, y, switch.width, switch.height))
+    # Draw a circle in the middle to make it look like a button
+    pygame.draw.circle(screen, BLACK, (x + switch.width // 2, y + switch.height // 2), switch.width // 3)
+
+def draw_pressure_plate(screen, plate: PressurePlate, origin: Tuple[int, int] = (0, 0)):
+    x, y = plate.x - origin[0], plate.y - origin[1]
+    color = plate.color_active if plate.is_active else plate.color_inactive
+    pygame.draw.rect(screen, color, (x, y, plate.width, plate.height))
+    # Draw lines to make it look like a pressure plate
+    for i in range(1, 4):
+        offset = i * (plate.width // 4)
+        pygame.draw.line(screen, BLACK, (x + offset, y),
+                        (x + offset, y + plate.height), 2)
+
+def draw_gate(screen, gate: Gate, origin: Tuple[int, int] = (0, 0)):
+    if not gate.is_open:
+        x, y = gate.x - origin[0], gate.y - origin[1]
+        pygame.draw.rect(screen, gate.color_closed, (x, y, gate.width, gate.height))
+        # Add some lines to make it look like a gate
+        for i in range(0, gate.width, 10):
+            pygame.draw.line(screen, BLACK, (x + i, y),
+                            (x + i, y + gate.height), 2)
+
+def draw_terminal(screen, terminal: Terminal, origin: Tuple[int, int] = (0, 0)):
+    x, y = terminal.x - origin[0], terminal.y - origin[1]
+    pygame.draw.rect(screen, terminal.color, (x, y, terminal.width, terminal.height))
+    # Draw a terminal-like symbol
+    inner_rect = (x + 5, y + 5, terminal.width - 10, terminal.height - 10)
+    pygame.draw.rect(screen, BLACK, inner_rect)
+    # Draw a cursor
+    if terminal.is_active:
+        cursor_x = x + 10
+        cursor_y = y + terminal.height // 2
+        pygame.draw.rect(screen, WHITE, (cursor_x, cursor_y, 10, 2))
+
+def draw_exit(screen, exit: Exit, origin: Tuple[int, int] = (0, 0)):
+    x, y = exit.x - origin[0], exit.y - origin[1]
+    pygame.draw.rect(screen, exit.color, (x, y, exit.width, exit.height))
+    # Draw an exit symbol
+    pygame.draw.polygon(screen, WHITE, [
+        (x + exit.width // 2, y + 5),
+        (x + exit.width - 5, y + exit.height // 2),
+        (x + exit.width // 2, y + exit.height - 5),
+        (x + 5, y + exit.height // 2)
+    ])
+
+DRAW_FUNCTIONS = {
+    Wall: draw_wall,
+    Gate: draw_gate,
+    Switch: draw_switch,
+    PressurePlate: draw_pressure_plate,
+    Terminal: draw_terminal,
+    Exit: draw_exit,
+    Player: draw_player,
+}
+
+# What, besides its size, sets how an entity of each type looks
+LOOKS = {
+    Wall: lambda wall: wall.color,
+    Gate: lambda gate: gate.is_open,
+    Switch: lambda switch: switch.is_active,
+    PressurePlate: lambda plate: plate.is_active,
+    Terminal: lambda terminal: (terminal.color, terminal.is_active),
+    Exit: lambda exit: exit.color,
+    Player: lambda player: player.color,
+    Echo: lambda echo: (echo.color, echo.alpha),
+}
+
+# Entity Sprites class
+class EntitySprites:
+    """Each entity type, size and state rasterized once by its draw function.
+
+    Every entity fills its rectangle with opaque pixels, so a sprite blitted
+    at the entity's position looks like drawing it there directly, except
+    that the decoration lines which used to overrun the rectangle by a
+    pixel are now clipped to it. Echoes, which are translucent, come from
+    `sprite_cache` instead.
+    """
+
+    def __init__(self):
+        self.sprites: Dict[Tuple, Optional[pygame.Surface]] = {}
+
+    def get(self, obj) -> Optional[pygame.Surface]:
+        """The entity's current look, or None if it draws nothing (an open gate)"""
+        kind = type(obj)
+        key = (kind, obj.width, obj.height, LOOKS[kind](obj))
+        try:
+            return self.sprites[key]
+        except KeyError:
+            sprite = self.sprites[key] = self.rasterize(obj)
+            return sprite
+
+    def rasterize(self, obj) -> Optional[pygame.Surface]:
+        if isinstance(obj, Echo):
+            return sprite_cache.get(obj.color, obj.alpha, (obj.width, obj.height))
+        if isinstance(obj, Gate) and obj.is_open:
+            return None
+        sprite = pygame.Surface((obj.width, obj.height))
+        DRAW_FUNCTIONS[type(obj)](sprite, obj, (obj.x, obj.y))
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()
+        return sprite
+
+    def batch(self, objects: Iterable, origin: Tuple[int, int] = (0, 0)) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        """(sprite, screen position) pairs for `objects`, ready for Surface.blits"""
+        ox, oy = origin
+        get = self.get
+        sequence = []
+        for obj in objects:
+            sprite = get(obj)
+            if sprite is not None:
+                sequence.append((sprite, (obj.x - ox, obj.y - oy)))
+        return sequence
+
+    def clear(self):
+        self.sprites.clear()
+
+# Shared cache of rasterized entities
+entity_sprites = EntitySprites()
+
+def draw_level(screen, level: Level, view: Optional[Tuple[int, int, int, int]] = None):
+    """Draw the level objects inside `view` (world x, y, width, height), back to front.
+
+    Without a view the whole level is drawn at its own coordinates.
+    """
+    if view is None:
+        objects, origin = level.get_scenery(), (0, 0)
+    else:
+        objects, origin = level.visible_objects(*view), view[:2]
+    screen.blits(entity_sprites.batch(objects, origin), doreturn=False)
+
+# Level Background class
+class LevelBackground:
+    """Pre-rendered screen-sized view of everything in a level that does not move.
+
+    That includes static echoes: echoes that have made their last move of
+    the loop. They settle one by one, so each is drawn into the existing
+    surface as it does, and the areas that changed are left in `changed`.
+    """
+
+    def __init__(self, size: Tuple[int, int]):
+        self.surface = pygame.Surface(size).convert()
+        self.level: Optional[Level] = None
+        self.state_version = -1
+        self.origin: Optional[Tuple[int, int]] = None
+        self.static_epoch = -1
+        self.static_count = 0
+        self.changed: List[pygame.Rect] = []
+
+    def invalidate(self):
+        self.level = None
+
+    def refresh(self, level: Level, origin: Tuple[int, int] = (0, 0),
+                static_echoes: Sequence[Player] = (), static_epoch: int = 0) -> bool:
+        """Rebuild the surface if the level, its trigger state or the camera changed.
+
+        Only objects inside the view are looked up and drawn, so the cost
+        depends on the screen area rather than the level size. Returns True
+        when the surface was redrawn. `static_echoes` may only grow while
+        `static_epoch` stays the same.
+        """
+        self.changed = []
+        if (level is self.level and level.state_version == self.state_version and origin == self.origin
+                and static_epoch == self.static_epoch):
+            # Newly settled echoes go straight onto the surface
+            for echo in static_echoes[self.static_count:]:
+                self.changed.append(draw_player(self.surface, echo, origin))
+            self.static_count = len(static_echoes)
+            return False
+
+        self.surface.fill(BLACK)
+        view = (*origin, *self.surface.get_size())
+        draw_level(self.surface, level, view)
+        visible = [echo for echo in static_echoes if rects_overlap(*view, echo.x, echo.y, echo.width, echo.height)]
+        self.surface.blits(entity_sprites.batch(visible, origin), doreturn=False)
+        self.level = level
+        self.state_version = level.state_version
+        self.origin = origin
+        self.static_epoch = static_epoch
+        self.static_count = len(static_echoes)
+        return True
+
+# Dirty Rects class
+class DirtyRects:
+    """Screen areas drawn over the background this frame and the previous one"""
+
+    def __init__(self):
+        self.previous: List[pygame.Rect] = []
+        self.current: List[pygame.Rect] = []
+
+    def add(self, rect: pygame.Rect):
+        self.current.append(rect)
+
+    def restore(self, screen, background):
+        """Erase last frame's moving entities by copying the background back"""
+        for rect in self.previous:
+            screen.blit(background, rect, rect)
+
+    def flush(self) -> List[pygame.Rect]:
+        """Return the areas that must be pushed to the display this frame"""
+        rects = self.previous + self.current
+        self.previous = self.current
+        self.current = []
+        return rects
+
+    def reset(self):
+        """Forget old areas after the whole screen has been redrawn"""
+        self.previous = []
+        self.current = []
@@ -0,0 +1,185 @@
+"""Compact binary replay files.
+
+A replay holds one complete run of a level: the level number, the tick
+metadata needed to re-simulate it and the action stream of every loop. The
+layout is fixed-width and little-endian so a file can be memory-mapped and
+read as NumPy arrays without building a Python object per action:
+
+    header      magic "EOCR", version, level number, tick rate, player speed,
+                loop ticks, loop count, seed, start x/y
+    loop table  one (offset, record count, tick count) entry per loop
+    records     one per recorded keyframe, 10 bytes each: tick delta (u16),
+                x delta (i16), y delta (i16), span in ticks (u16),
+                action type << 4 | direction (u8), padding (u8)
+
+Deltas are taken against the previous record of the same loop, the first
+record against tick 0 and the level start. The tick count is how many ticks
+the loop ran, idle ones at the end included.
+"""
+import mmap
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from actionlog import ActionLogView, INTERACT
+from playback import EchoPlayback
+from level_loader import LevelManager
+from simulation import DIRECTIONS, Direction, Simulation
+
+MAGIC = b"EOCR"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHHHIIQii")
+LOOP_ENTRY = struct.Struct("<QII")
+RECORD_DTYPE = np.dtype([("dtick", "<u2"), ("dx", "<i2"), ("dy", "<i2"), ("span", "<u2"), ("code", "u1"),
+                         ("pad", "u1")])
+
+def encode_loop(actions: ActionLogView, start: Tuple[int, int]) -> np.ndarray:
+    """Delta-encode one loop's actions into fixed-width records"""
+    ticks, xs, ys, directions, types, spans = (np.frombuffer(column, dtype=column.typecode).astype(np.int64)
+                                               for column in actions.columns())
+    records = np.zeros(len(ticks), dtype=RECORD_DTYPE)
+    records["dtick"] = np.diff(ticks, prepend=0)
+    records["dx"] = np.diff(xs, prepend=start[0])
+    records["dy"] = np.diff(ys, prepend=start[1])
+    records["span"] = spans
+    records["code"] = (types << 4) | directions
+    return records
+
+def decode_records(records: np.ndarray, start: Tuple[int, int]):
+    """Turn records back into (ticks, xs, ys, directions, types, spans) columns"""
+    ticks = np.cumsum(records["dtick"], dtype=np.int64)
+    xs = start[0] + np.cumsum(records["dx"], dtype=np.int64)
+    ys = start[1] + np.cumsum(records["dy"], dtype=np.int64)
+    directions = (records["code"] & 0x0F).astype(np.int8)
+    types = (records["code"] >> 4).astype(np.int8)
+    spans = records["span"].astype(np.int64)
+    return ticks, xs, ys, directions, types, spans
+
+def write_replay(path: str, level_number: int, loops: Sequence[ActionLogView], start: Tuple[int, int],
+                 tick_rate: int, loop_ticks: int, speed: int, seed: int = 0,
+                 last_loop_ticks: Optional[int] = None):
+    """Every loop but the last ran `loop_ticks` ticks; the last ran `last_loop_ticks`,
+    by default as far as its recording goes"""
+    encoded = [encode_loop(actions, start) for actions in loops]
+    lengths = [loop_ticks] * len(encoded)
+    if encoded:
+        lengths[-1] = last_loop_ticks if last_loop_ticks is not None else recorded_ticks(loops[-1])
+
+    offset = HEADER.size + LOOP_ENTRY.size * len(encoded)
+    table = []
+    for records, length in zip(encoded, lengths):
+        table.append(LOOP_ENTRY.pack(offset, len(records), length))
+        offset += records.nbytes
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, level_number, tick_rate, speed, loop_ticks, len(encoded), seed,
+                            start[0], start[1]))
+        f.writelines(table)
+        for records in encoded:
+            f.write(records.tobytes())
+
+def recorded_ticks(actions: ActionLogView) -> int:
+    """Ticks up to the end of the last keyframe"""
+    if not len(actions):
+        return 0
+    last = len(actions) - 1
+    return actions.tick(last) + actions.span(last)
+
+def save_simulation(path: str, sim: Simulation, seed: int = 0):
+    """Save the current level's run so far: every echo's loop plus the live one"""
+    level = sim.get_current_level()
+    loops = [echo.actions for echo in sim.echoes] + [sim.player.actions.view()]
+    timer_manager = sim.timer_manager
+    live_ticks = timer_manager.get_loop_tick()
+    if sim.state == "level_complete":
+        # The tick that completed the level stopped before the clock advanced
+        live_ticks += 1
+    write_replay(path, level.level_number, loops, level.player_start,
+                 timer_manager.clock.tick_rate, timer_manager.loop_ticks, sim.player.speed, seed, live_ticks)
+
+# Replay File class
+class ReplayFile:
+    """Memory-mapped reader for a replay written by `write_replay`"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.level_number, self.tick_rate, speed, self.loop_ticks, self.loop_count, self.seed,
+         start_x, start_y) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an Echoes of Code replay")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} has unsupported replay version {version}")
+        self.speed = speed
+        self.start = (start_x, start_y)
+
+        table = [LOOP_ENTRY.unpack_from(self.map, HEADER.size + LOOP_ENTRY.size * i) for i in range(self.loop_count)]
+        self.loops = [(offset, count) for offset, count, _ in table]
+        self.loop_lengths = [length for _, _, length in table]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def records(self, loop: int) -> np.ndarray:
+        """Zero-copy view of a loop's records; only valid until the file is closed"""
+        offset, count = self.loops[loop]
+        return np.frombuffer(self.map, dtype=RECORD_DTYPE, count=count, offset=offset)
+
+    def columns(self, loop: int):
+        """Decoded (ticks, xs, ys, directions, types, spans) arrays of a loop"""
+        return decode_records(self.records(loop), self.start)
+
+    def load_echoes(self, playback: EchoPlayback, loops: Optional[Sequence[int]] = None):
+        """Stream loops straight into an echo playback engine"""
+        for loop in range(self.loop_count) if loops is None else loops:
+            playback.add_columns(*self.columns(loop), self.start, self.speed)
+
+    def inputs(self, loop: int) -> List[Tuple[Direction, bool]]:
+        """Per-tick (direction, interact) inputs that reproduce a loop.
+
+        Only moves that succeeded and interactions that hit something are
+        recorded, and those are exactly the inputs that changed the world, so
+        feeding them back reproduces the loop tick for tick.
+        """
+        ticks, _, _, directions, types, spans = self.columns(loop)
+        ends = ticks + spans
+        inputs = [(Direction.NONE, False)] * self.loop_lengths[loop]
+        for tick, end, direction, action_type in zip(ticks.tolist(), ends.tolist(), directions.tolist(),
+                                                     types.tolist()):
+            if action_type == INTERACT:
+                inputs[tick] = (inputs[tick][0], True)
+            else:
+                # A keyframe stands for a move on every tick of its span
+                for t in range(tick, end):
+                    inputs[t] = (DIRECTIONS[direction], inputs[t][1])
+        return inputs
+
+    def resimulate(self, level_manager: Optional[LevelManager] = None) -> Simulation:
+        """Play the whole run again headlessly and return the final simulation"""
+        level_manager = level_manager if level_manager is not None else LevelManager()
+        for index in range(level_manager.level_count):
+            if level_manager.get_level(index).level_number == self.level_number:
+                level_manager.current_level_index = index
+                break
+        else:
+            raise ValueError(f"Replay is for unknown level {self.level_number}")
+
+        sim = Simulation(level_manager)
+        if sim.timer_manager.loop_ticks != self.loop_ticks:
+            raise ValueError(f"Replay uses {self.loop_ticks}-tick loops, the game uses {sim.timer_manager.loop_ticks}")
+        for loop in range(self.loop_count):
+            sim.run(self.inputs(loop))
+        return sim
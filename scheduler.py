@@ -0,0 +1,51 @@
+"""Fixed-rate simulation steps under a variable-rate render loop.
+
+The simulation advances in whole ticks of 1 / tick_rate seconds whatever the
+frame rate is. Each frame, `advance` turns the real time elapsed since the
+last frame into the number of ticks that are due, keeping the remainder for
+later, and `alpha` is how far the present lies between the last tick and the
+next one, for drawing moving things in between. A frame that takes too long
+runs at most `max_steps` ticks and lets the rest of the backlog go, so a slow
+renderer slows the game down instead of stalling it in catch-up steps.
+"""
+import time
+from typing import Callable, Optional
+
+# Fixed Step Scheduler class
+class FixedStepScheduler:
+    def __init__(self, tick_rate: int, max_steps: int = 5, clock: Callable[[], float] = time.perf_counter):
+        self.step_time = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.clock = clock
+        self.accumulator = 0.0
+        self.last_time: Optional[float] = None
+        self.dropped = 0  # ticks given up because frames ran too long
+
+    def reset(self):
+        """Forget the time that passed, e.g. while waiting on a menu screen"""
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self) -> int:
+        """The number of ticks to run this frame"""
+        now = self.clock()
+        if self.last_time is None:
+            # The first frame after a reset runs one tick straight away
+            self.last_time = now
+            self.accumulator = self.step_time
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator / self.step_time)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_time
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """Fraction of a tick since the last one ran, in [0, 1)"""
+        return min(self.accumulator / self.step_time, 1.0)
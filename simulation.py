@@ -0,0 +1,780 @@
+"""Headless simulation core for Echoes of Code.
+
+Holds the level, player, echo and trigger state together with the rules that
+drive them. Nothing in here imports pygame, so validators, benchmarks and
+batch replays can run without a display or an audio device.
+"""
+from enum import Enum
+from typing import Dict, Iterable, List, Set, Tuple, Optional, Union
+
+from actionlog import ActionLog, ActionLogView, ACTION_TYPES
+from spatial import SpatialGrid, rects_overlap
+from profiler import FrameProfiler
+from snapshot import WorldSnapshot
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+TILE_SIZE = 40
+FPS = 60
+LOOP_DURATION = 10  # seconds
+SCENERY_CELL_SIZE = TILE_SIZE * 4  # coarse cells: culling queries cover a whole screen
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+CYAN = (0, 255, 255)
+PURPLE = (128, 0, 128)
+GRAY = (128, 128, 128)
+
+# Colors handed out to echoes, in the order they are created
+ECHO_COLORS = [PURPLE, YELLOW, CYAN, RED, GREEN]
+ECHO_ALPHA = 128  # Echoes are drawn semi-transparent
+
+# Direction enum for movement
+class Direction(Enum):
+    NONE = 0
+    UP = 1
+    DOWN = 2
+    LEFT = 3
+    RIGHT = 4
+
+# Directions indexed by their value, for decoding recorded direction codes
+DIRECTIONS = tuple(Direction)
+
+def objects_overlap(a, b) -> bool:
+    """Overlap test for any two objects exposing x, y, width and height"""
+    return rects_overlap(a.x, a.y, a.width, a.height, b.x, b.y, b.width, b.height)
+
+# Player class
+class Player:
+    def __init__(self, x: int, y: int, color: Tuple[int, int, int] = BLUE):
+        self.x = x
+        self.y = y
+        self.width = TILE_SIZE - 10
+        self.height = TILE_SIZE - 10
+        self.color = color
+        self.speed = 5
+        self.actions = ActionLog(self.speed)
+        self.current_direction = Direction.NONE
+        self.is_echo = False
+        self.alpha = 255  # For transparency (255 = fully opaque)
+
+    def move(self, direction: Direction, blockers: SpatialGrid, bounds: Tuple[int, int] = (SCREEN_WIDTH, SCREEN_HEIGHT)):
+        old_x, old_y = self.x, self.y
+
+        if direction == Direction.UP:
+            self.y -= self.speed
+        elif direction == Direction.DOWN:
+            self.y += self.speed
+        elif direction == Direction.LEFT:
+            self.x -= self.speed
+        elif direction == Direction.RIGHT:
+            self.x += self.speed
+
+        # Check for collisions with walls and closed gates
+        if self.check_collision(blockers):
+            self.x, self.y = old_x, old_y
+            return False
+
+        # Keep player within the world
+        self.x = max(0, min(self.x, bounds[0] - self.width))
+        self.y = max(0, min(self.y, bounds[1] - self.height))
+
+        self.current_direction = direction
+        return True
+
+    def check_collision(self, blockers: SpatialGrid) -> bool:
+        # The grid only holds walls and closed gates, so any overlap blocks
+        return blockers.any_overlapping(self.x, self.y, self.width, self.height)
+
+    def record_action(self, action_type: str, tick: int):
+        self.actions.append(ACTION_TYPES[action_type], self.x, self.y, tick, self.current_direction.value)
+
+# Echo class (inherits from Player)
+class Echo(Player):
+    def __init__(self, player: Player, color: Tuple[int, int, int], loop_number: int, start: Tuple[int, int]):
+        super().__init__(start[0], start[1], color)
+        self.start = start
+        # The finished recording, with its stationary stretches folded; when
+        # there is nothing to fold it is shared with the player, not copied
+        self.actions: ActionLogView = player.actions.compacted().view()
+        self.is_echo = True
+        self.alpha = ECHO_ALPHA  # Semi-transparent
+        self.loop_number = loop_number  # Which loop this echo is from
+
+    def rewind(self):
+        """Go back to the start of the recording for a new loop"""
+        self.x, self.y = self.start
+        self.current_direction = Direction.NONE
+
+# Wall class
+class Wall:
+    def __init__(self, x: int, y: int, width: int, height: int):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = GRAY
+
+# Trigger class (base for everything that can open a gate)
+class Trigger:
+    def __init__(self, x: int, y: int, target_id: int):
+        self.x = x
+        self.y = y
+        self.width = TILE_SIZE
+        self.height = TILE_SIZE
+        self.is_active = False
+        self.target_id = target_id  # ID of the gate this trigger controls
+        self.level: Optional["Level"] = None  # Level notified when the state changes
+
+    def set_active(self, is_active: bool):
+        if is_active == self.is_active:
+            return
+        self.is_active = is_active
+        if self.level is not None:
+            self.level.trigger_changed(self)
+
+    def activate(self):
+        self.set_active(True)
+
+    def deactivate(self):
+        self.set_active(False)
+
+# Switch class
+class Switch(Trigger):
+    def __init__(self, x: int, y: int, target_id: int):
+        super().__init__(x, y, target_id)
+        self.color_inactive = RED
+        self.color_active = GREEN
+
+# Pressure Plate class
+class PressurePlate(Trigger):
+    def __init__(self, x: int, y: int, target_id: int):
+        super().__init__(x, y, target_id)
+        self.color_inactive = YELLOW
+        self.color_active = GREEN
+
+    def update_pressed(self, pressed: Set[int]):
+        """Press or release the plate, given the ids of every trigger someone stands on"""
+        self.set_active(id(self) in pressed)
+
+# Gate class
+class Gate:
+    def __init__(self, x: int, y: int, width: int, height: int, gate_id: int):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.gate_id = gate_id
+        self.is_open = False
+        self.color_closed = RED
+        self.color_open = GREEN
+        self.blockers: Optional[SpatialGrid] = None  # Collision grid of the owning level
+
+    def set_open(self, is_open: bool):
+        if is_open == self.is_open:
+            return
+        self.is_open = is_open
+
+        # Only closed gates block, so flip our cells in the collision grid
+        if self.blockers is not None:
+            if is_open:
+                self.blockers.remove(self)
+            else:
+                self.blockers.insert(self)
+
+# Terminal class
+class Terminal(Trigger):
+    def __init__(self, x: int, y: int, target_id: int):
+        super().__init__(x, y, target_id)
+        self.color = CYAN
+
+# Exit class
+class Exit:
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+        self.width = TILE_SIZE
+        self.height = TILE_SIZE
+        self.color = GREEN
+
+    def check_player_reached(self, player: Player) -> bool:
+        return objects_overlap(self, player)
+
+# Tick Clock class
+class TickClock:
+    """Integer tick counter that stands in for wall-clock time.
+
+    All simulation time is measured in ticks of 1/tick_rate seconds, so a run
+    is a pure function of its inputs and can be stepped as fast as the CPU
+    allows instead of in real time.
+    """
+
+    def __init__(self, tick_rate: int = FPS):
+        self.tick_rate = tick_rate
+        self.tick = 0
+
+    def advance(self, ticks: int = 1):
+        self.tick += ticks
+
+    def to_seconds(self, ticks: int) -> float:
+        return ticks / self.tick_rate
+
+    def to_ticks(self, seconds: float) -> int:
+        return int(round(seconds * self.tick_rate))
+
+# Timer Manager class
+class TimerManager:
+    def __init__(self, loop_duration: float, max_loops: int, tick_rate: int = FPS):
+        self.loop_duration = loop_duration
+        self.max_loops = max_loops
+        self.clock = TickClock(tick_rate)
+        self.loop_ticks = self.clock.to_ticks(loop_duration)
+        self.loop_start_tick = 0
+        self.current_loop = 1
+        self.paused = False
+
+    def tick(self):
+        """Advance time by one simulation step unless paused"""
+        if not self.paused:
+            self.clock.advance()
+
+    def get_elapsed_ticks(self) -> int:
+        return self.clock.tick
+
+    def get_loop_tick(self) -> int:
+        """Get ticks elapsed in the current loop"""
+        return self.clock.tick - self.loop_start_tick
+
+    def get_elapsed_time(self) -> float:
+        return self.clock.to_seconds(self.get_elapsed_ticks())
+
+    def get_loop_time(self) -> float:
+        """Get time elapsed in the current loop"""
+        return self.clock.to_seconds(self.get_loop_tick())
+
+    def get_time_remaining(self) -> float:
+        """Get time remaining in the current loop"""
+        return self.clock.to_seconds(self.loop_ticks - self.get_loop_tick())
+
+    def should_reset_loop(self) -> bool:
+        return self.get_loop_tick() >= self.loop_ticks
+
+    def reset_loop(self):
+        self.current_loop += 1
+        self.loop_start_tick = self.clock.tick
+
+    def is_game_over(self) -> bool:
+        return self.current_loop > self.max_loops
+
+    def pause(self):
+        self.paused = True
+
+    def unpause(self):
+        self.paused = False
+
+# Level class
+class Level:
+    def __init__(self, level_number: int, player_start: Tuple[int, int], max_loops: int,
+                 width: int = SCREEN_WIDTH, height: int = SCREEN_HEIGHT):
+        self.level_number = level_number
+        self.player_start = player_start
+        self.max_loops = max_loops
+        self.width = width  # world size in pixels, independent of the screen
+        self.height = height
+        self.walls = []
+        self.switches = []
+        self.pressure_plates = []
+        self.gates = []
+        self.terminals = []
+        self.exit = None
+        self.completed = False
+        # Walls and closed gates, bucketed by tile for collision queries
+        self.blockers = SpatialGrid(TILE_SIZE)
+        # Everything drawable, for viewport culling; built on first use
+        self.scenery_index: Optional[SpatialGrid] = None
+        self.scenery_order: Dict[int, int] = {}  # id -> position in drawing order
+        # Switches, plates and terminals, for finding the ones someone stands
+        # on without testing every trigger; built on first use
+        self.trigger_index: Optional[SpatialGrid] = None
+
+        # target_id -> triggers and gates sharing it, and the targets whose
+        # triggers changed since gates were last recomputed
+        self.triggers_by_target: Dict[int, List[Trigger]] = {}
+        self.gates_by_target: Dict[int, List[Gate]] = {}
+        self.dirty_targets = set()
+        # Bumped on every trigger change, so views can tell when to redraw
+        self.state_version = 0
+
+    def add_wall(self, x: int, y: int, width: int, height: int):
+        wall = Wall(x, y, width, height)
+        self.walls.append(wall)
+        self.blockers.insert(wall)
+        self.scenery_index = None
+
+    def add_trigger(self, trigger: Trigger):
+        trigger.level = self
+        self.triggers_by_target.setdefault(trigger.target_id, []).append(trigger)
+        self.scenery_index = None
+        self.trigger_index = None
+
+    def add_switch(self, x: int, y: int, target_id: int):
+        switch = Switch(x, y, target_id)
+        self.switches.append(switch)
+        self.add_trigger(switch)
+
+    def add_pressure_plate(self, x: int, y: int, target_id: int):
+        plate = PressurePlate(x, y, target_id)
+        self.pressure_plates.append(plate)
+        self.add_trigger(plate)
+
+    def add_gate(self, x: int, y: int, width: int, height: int, gate_id: int):
+        gate = Gate(x, y, width, height, gate_id)
+        gate.blockers = self.blockers
+        self.gates.append(gate)
+        self.gates_by_target.setdefault(gate_id, []).append(gate)
+        # Gates start closed
+        self.blockers.insert(gate)
+        self.scenery_index = None
+
+    def add_terminal(self, x: int, y: int, target_id: int):
+        terminal = Terminal(x, y, target_id)
+        self.terminals.append(terminal)
+        self.add_trigger(terminal)
+
+    def set_exit(self, x: int, y: int):
+        self.exit = Exit(x, y)
+        self.scenery_index = None
+
+    def get_interactive_objects(self):
+        return self.switches + self.pressure_plates + self.terminals
+
+    def get_scenery(self) -> List:
+        """Every static object in back-to-front drawing order"""
+        return (self.walls + self.gates + self.switches + self.pressure_plates + self.terminals
+                + ([self.exit] if self.exit else []))
+
+    def visible_objects(self, x: int, y: int, width: int, height: int) -> List:
+        """Static objects overlapping a rectangle, in drawing order"""
+        if self.scenery_index is None:
+            self.scenery_index = SpatialGrid(SCENERY_CELL_SIZE)
+            self.scenery_order.clear()
+            for order, obj in enumerate(self.get_scenery()):
+                self.scenery_index.insert(obj)
+                self.scenery_order[id(obj)] = order
+        order = self.scenery_order
+        return sorted(self.scenery_index.find_overlapping(x, y, width, height), key=lambda obj: order[id(obj)])
+
+    def get_trigger_index(self) -> SpatialGrid:
+        if self.trigger_index is None:
+            self.trigger_index = SpatialGrid(TILE_SIZE)
+            for trigger in self.get_interactive_objects():
+                self.trigger_index.insert(trigger)
+        return self.trigger_index
+
+    def triggers_near(self, x: int, y: int, width: int, height: int) -> List[Trigger]:
+        """Triggers that may overlap a rectangle, in no particular order"""
+        return self.get_trigger_index().query(x, y, width, height)
+
+    def trigger_changed(self, trigger: Trigger):
+        self.dirty_targets.add(trigger.target_id)
+        self.state_version += 1
+
+    def update_gates(self):
+        """Recompute only the gates whose triggers changed state"""
+        for target_id in self.dirty_targets:
+            is_open = any(trigger.is_active for trigger in self.triggers_by_target.get(target_id, ()))
+            for gate in self.gates_by_target.get(target_id, ()):
+                gate.set_open(is_open)
+        self.dirty_targets.clear()
+
+    def reset(self):
+        """Put every trigger and gate back into its initial state"""
+        for obj in self.get_interactive_objects():
+            obj.deactivate()
+        self.update_gates()
+        self.completed = False
+
+    def update_triggers(self, players: List[Player], timeline: Optional["TriggerTimeline"] = None):
+        """Update plates and gates for `players` standing where they are.
+
+        With a timeline, echoes are accounted for by its compiled schedule and
+        `players` need only hold the live player.
+        """
+        # Update pressure plates, finding the occupied ones with one grid
+        # lookup per player or echo rather than a test per plate and player
+        if self.pressure_plates:
+            pressed = self.get_trigger_index().overlapped_by(players)
+            if timeline is None:
+                for plate in self.pressure_plates:
+                    plate.update_pressed(pressed)
+            else:
+                timeline.update_plates(pressed)
+
+        # Update gates whose switches, plates or terminals changed
+        if self.dirty_targets:
+            self.update_gates()
+
+    def update(self, players: List[Player], timeline: Optional["TriggerTimeline"] = None):
+        self.update_triggers(players, timeline)
+
+        # Check if player reached exit
+        if self.exit and players and not self.completed:
+            if self.exit.check_player_reached(players[0]):  # Check only the main player
+                self.completed = True
+                return True
+
+        return False
+
+# Simulation class
+class Simulation:
+    """The whole game world and its rules, advanced one step at a time.
+
+    `step` returns the names of the events that happened during the step
+    ("interact", "loop_reset", "level_complete", "game_over") so that a front
+    end can react to them (play sounds, switch screens) without the
+    simulation knowing anything about it.
+    """
+
+    def __init__(self, level_manager: Optional["LevelManager"] = None):
+        if level_manager is None:
+            # level_loader builds on this module, so it can only be imported here
+            from level_loader import LevelManager
+            level_manager = LevelManager()
+        self.level_manager = level_manager
+        self.state = "playing"  # "playing", "level_complete", "game_over", "game_complete"
+        self.profiler = FrameProfiler()  # Disabled unless a front end switches it on
+        # Shared by snapshots until the triggers change or an echo is added
+        self.trigger_states: Tuple = (None, -1, ())  # (level, state_version, states)
+        self.echo_tuple: Tuple = ()
+        # Bytes of echo recordings to keep at most; past it the oldest echoes
+        # are retired at the next loop reset. None keeps every echo.
+        self.history_budget: Optional[int] = None
+        # Bumped whenever echoes that had settled may be moving again
+        self.static_epoch = 0
+        self.reset_game()
+
+    def get_current_level(self) -> Level:
+        return self.level_manager.get_current_level()
+
+    @property
+    def tick(self) -> int:
+        return self.timer_manager.get_elapsed_ticks()
+
+    def reset_game(self):
+        current_level = self.get_current_level()
+        current_level.reset()
+        self.player = Player(current_level.player_start[0], current_level.player_start[1])
+        self.echoes = []
+        self.playback = None  # EchoPlayback, created with the first echo
+        self.timeline = None  # TriggerTimeline, likewise
+        self.static_epoch += 1
+        self.timer_manager = TimerManager(LOOP_DURATION, current_level.max_loops)
+        # Plates and gates start out matching where everyone stands
+        current_level.update_triggers([self.player])
+        self.loop_start_snapshot = None
+        self.loop_start_snapshot = self.snapshot()
+
+    def advance(self):
+        """Leave a completion/game-over screen, like pressing SPACE does"""
+        if self.state == "level_complete":
+            if self.level_manager.next_level():
+                self.reset_game()
+                self.state = "playing"
+            else:
+                self.state = "game_complete"
+        elif self.state in ["game_over", "game_complete"]:
+            self.level_manager.current_level_index = 0
+            self.reset_game()
+            self.state = "playing"
+
+    def interact_with_objects(self) -> bool:
+        if self.state != "playing":
+            return False
+
+        current_level = self.get_current_level()
+        interacted = False
+
+        player = self.player
+        for obj in current_level.triggers_near(player.x, player.y, player.width, player.height):
+            if objects_overlap(self.player, obj):
+                if isinstance(obj, Terminal) or isinstance(obj, Switch):
+                    obj.activate()
+                    # Record the interaction
+                    self.player.record_action("interact", self.timer_manager.get_loop_tick())
+                    interacted = True
+
+        return interacted
+
+    def step(self, direction: Direction = Direction.NONE, interact: bool = False) -> List[str]:
+        events = []
+        if self.state != "playing":
+            return events
+
+        current_level = self.get_current_level()
+
+        if interact and self.interact_with_objects():
+            events.append("interact")
+
+        profiler = self.profiler
+
+        # Handle player movement
+        with profiler.phase("player_move"):
+            if direction != Direction.NONE:
+                if self.player.move(direction, current_level.blockers, (current_level.width, current_level.height)):
+                    # Record the movement
+                    self.player.record_action("move", self.timer_manager.get_loop_tick())
+
+        # Update echoes
+        if self.playback is not None:
+            with profiler.phase("echo_updates"):
+                self.update_echoes(current_level)
+
+        # Update level objects; echoes come in through the timeline
+        with profiler.phase("level_update"):
+            level_completed = current_level.update([self.player], self.timeline)
+        if level_completed:
+            # Level completed
+            self.state = "level_complete"
+            events.append("level_complete")
+            return events
+
+        self.timer_manager.tick()
+
+        # Check if loop should reset
+        if self.timer_manager.should_reset_loop():
+            self.reset_loop()
+            events.append("loop_reset")
+
+        # Check if game is over (max loops reached)
+        if self.timer_manager.is_game_over():
+            self.state = "game_over"
+            events.append("game_over")
+
+        return events
+
+    def update_echoes(self, current_level: Level):
+        """Resolve every echo's position for this tick in one batched lookup,
+        and apply the trigger events they have due"""
+        loop_tick = self.timer_manager.get_loop_tick()
+        # Echoes that have settled are skipped
+        self.sync_echoes(self.playback.locate(loop_tick))
+        self.timeline.update(loop_tick)
+
+    def sync_echoes(self, indices=None):
+        """Copy the playback engine's positions onto the echo objects, all or just `indices`"""
+        playback = self.playback
+        if indices is None:
+            echoes, xs, ys, directions = self.echoes, playback.x, playback.y, playback.direction
+        else:
+            echoes = [self.echoes[index] for index in indices.tolist()]
+            xs, ys, directions = playback.x[indices], playback.y[indices], playback.direction[indices]
+        for echo, x, y, direction in zip(echoes, xs.tolist(), ys.tolist(), directions.tolist()):
+            echo.x = x
+            echo.y = y
+            echo.current_direction = DIRECTIONS[direction]
+
+    def static_echoes(self) -> List[Echo]:
+        """Echoes that will not move again this loop, in the order they settled"""
+        if self.playback is None:
+            return []
+        echoes = self.echoes
+        return [echoes[index] for index in self.playback.static_echoes().tolist()]
+
+    def moving_echoes(self) -> List[Echo]:
+        if self.playback is None:
+            return []
+        echoes = self.echoes
+        return [echoes[index] for index in self.playback.settle_order[self.playback.static_count:].tolist()]
+
+    def recording_stats(self) -> Dict[str, int]:
+        """Memory held by the echoes' recordings and the structures compiled from them"""
+        recordings = sum(echo.actions.nbytes for echo in self.echoes)
+        compiled = ((self.playback.nbytes if self.playback is not None else 0)
+                    + (self.timeline.nbytes if self.timeline is not None else 0))
+        count = len(self.echoes)
+        return {
+            "echoes": count,
+            "keyframes": sum(len(echo.actions) for echo in self.echoes),
+            "recording_bytes": recordings,
+            "compiled_bytes": compiled,
+            "bytes_per_echo": (recordings + compiled) // count if count else 0,
+        }
+
+    def retire_echoes(self, level: Level):
+        """Drop the oldest echoes until the recordings fit the history budget"""
+        budget = self.history_budget
+        if budget is None:
+            return
+        sizes = [echo.actions.nbytes for echo in self.echoes]
+        total = sum(sizes)
+        retired = 0
+        # The newest echo always stays
+        while total > budget and retired < len(sizes) - 1:
+            total -= sizes[retired]
+            retired += 1
+        if not retired:
+            return
+
+        from playback import EchoPlayback
+        from timeline import TriggerTimeline
+        self.echoes = self.echoes[retired:]
+        self.playback = EchoPlayback()
+        self.timeline = TriggerTimeline(level)
+        for echo in self.echoes:
+            index = self.playback.add(echo.actions, echo.start)
+            self.timeline.add(self.playback, index, echo.width, echo.height)
+
+    def reset_loop(self):
+        # Create a new echo from the current player
+        current_level = self.get_current_level()
+        echo_color = ECHO_COLORS[min(len(self.echoes), len(ECHO_COLORS) - 1)]
+        echo = Echo(self.player, echo_color, self.timer_manager.current_loop, current_level.player_start)
+        self.echoes.append(echo)
+
+        if self.playback is None:
+            # NumPy is only needed once there are echoes to play back, which
+            # keeps `import simulation` cheap for tools that never get here
+            from playback import EchoPlayback
+            from timeline import TriggerTimeline
+            self.playback = EchoPlayback()
+            self.timeline = TriggerTimeline(current_level)
+        index = self.playback.add(echo.actions, echo.start)
+        # The echo's path is final now, so work out its effect on the triggers once
+        self.timeline.add(self.playback, index, echo.width, echo.height)
+        self.retire_echoes(current_level)
+        self.static_epoch += 1
+
+        # Every echo replays its recording from the start of the loop
+        for echo in self.echoes:
+            echo.rewind()
+
+        # Reset player position
+        self.player.x, self.player.y = current_level.player_start
+        self.player.current_direction = Direction.NONE
+
+        # Start a fresh recording; the echo keeps a view of the old one
+        self.player.actions = ActionLog(self.player.speed)
+
+        # Reset interactive objects
+        for obj in current_level.get_interactive_objects():
+            if isinstance(obj, Switch) or isinstance(obj, Terminal):
+                obj.deactivate()
+        self.timeline.rewind()
+        current_level.update_triggers([self.player], self.timeline)
+
+        # Increment loop counter
+        self.timer_manager.reset_loop()
+        self.loop_start_snapshot = None
+        self.loop_start_snapshot = self.snapshot()
+
+    def snapshot(self) -> WorldSnapshot:
+        """Capture the world between two steps; cheap enough to take every tick"""
+        level = self.get_current_level()
+        cached_level, version, states = self.trigger_states
+        if cached_level is not level or version != level.state_version:
+            states = tuple(obj.is_active for obj in level.get_interactive_objects())
+            self.trigger_states = (level, level.state_version, states)
+
+        echoes = self.echo_tuple
+        if len(echoes) != len(self.echoes) or (echoes and echoes[-1] is not self.echoes[-1]):
+            echoes = self.echo_tuple = tuple(self.echoes)
+
+        timer_manager = self.timer_manager
+        player = self.player
+        return WorldSnapshot(
+            level_index=self.level_manager.current_level_index,
+            state=self.state,
+            completed=level.completed,
+            tick=timer_manager.clock.tick,
+            loop_start_tick=timer_manager.loop_start_tick,
+            current_loop=timer_manager.current_loop,
+            max_loops=timer_manager.max_loops,
+            paused=timer_manager.paused,
+            player_x=player.x,
+            player_y=player.y,
+            player_direction=player.current_direction,
+            actions=player.actions.view(),
+            echoes=echoes,
+            playback=self.playback.state() if self.playback is not None else None,
+            timeline=self.timeline.state() if self.timeline is not None else None,
+            triggers=states,
+            loop_start=self.loop_start_snapshot,  # None for the loop start itself
+        )
+
+    def restore(self, snapshot: WorldSnapshot):
+        """Put the world back exactly as it was when `snapshot` was taken"""
+        self.level_manager.current_level_index = snapshot.level_index
+        level = self.get_current_level()
+        self.state = snapshot.state
+        level.completed = snapshot.completed
+
+        timer_manager = self.timer_manager
+        timer_manager.clock.tick = snapshot.tick
+        timer_manager.loop_start_tick = snapshot.loop_start_tick
+        timer_manager.current_loop = snapshot.current_loop
+        timer_manager.max_loops = snapshot.max_loops
+        timer_manager.paused = snapshot.paused
+
+        player = self.player
+        player.x, player.y = snapshot.player_x, snapshot.player_y
+        player.current_direction = snapshot.player_direction
+        # Keyframes recorded after the snapshot may belong to other snapshots,
+        # so the recording is forked rather than cut back
+        player.actions = snapshot.actions.resume()
+
+        if len(self.echoes) != len(snapshot.echoes) or (self.echoes and self.echoes[-1] is not snapshot.echoes[-1]):
+            self.echoes = list(snapshot.echoes)
+            self.echo_tuple = snapshot.echoes
+        if snapshot.playback is None:
+            self.playback = None
+            self.timeline = None
+        else:
+            if self.playback is None:
+                from playback import EchoPlayback
+                self.playback = EchoPlayback()
+            if self.timeline is None or self.timeline.level is not level:
+                from timeline import TriggerTimeline
+                self.timeline = TriggerTimeline(level)
+            # Echoes stand where the previous step's update left them
+            self.playback.restore(snapshot.playback, snapshot.loop_tick - 1)
+            self.timeline.restore(snapshot.timeline, snapshot.loop_tick - 1)
+            self.sync_echoes()
+        self.static_epoch += 1
+
+        # Only triggers that differ notify the level, and only their gates move
+        for obj, is_active in zip(level.get_interactive_objects(), snapshot.triggers):
+            obj.set_active(is_active)
+        level.update_gates()
+        self.trigger_states = (level, level.state_version, snapshot.triggers)
+        self.loop_start_snapshot = snapshot.loop_start or snapshot
+
+    def restart_loop(self):
+        """Go back to the start of the current loop, keeping the echoes"""
+        self.restore(self.loop_start_snapshot)
+
+    def run(self, inputs: Iterable[Union[Direction, Tuple[Direction, bool]]], max_ticks: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Step through `inputs` as fast as the CPU allows.
+
+        Each input is either a Direction or a (Direction, interact) pair and
+        is consumed by exactly one tick. Stops when the inputs run out, when
+        `max_ticks` steps have been taken or when play stops (level complete
+        or game over). Returns the (tick, event) pairs that were emitted.
+        """
+        log = []
+        for steps, entry in enumerate(inputs):
+            if self.state != "playing" or (max_ticks is not None and steps >= max_ticks):
+                break
+            if isinstance(entry, Direction):
+                direction, interact = entry, False
+            else:
+                direction, interact = entry
+            tick = self.tick
+            for event in self.step(direction, interact):
+                log.append((tick, event))
+        return log
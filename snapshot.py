@@ -0,0 +1,61 @@
+"""World snapshots for rewind, undo and branching.
+
+A `WorldSnapshot` is an immutable record of everything `Simulation.step`
+reads and writes: the timer, the player, the echoes, the trigger states and
+the play state. Taking one is cheap because nearly all of it is shared rather
+than copied:
+
+* the player's action log is append-only, so a snapshot keeps an O(1) view
+  of it instead of the entries;
+* echoes, their playback timelines and their compiled trigger schedules are
+  never modified after creation, so snapshots share them, and the echo
+  tuple is only rebuilt when an echo is added;
+* trigger states are captured once per `Level.state_version` and shared by
+  every snapshot taken until a trigger changes.
+
+Gates are not stored: they follow from the triggers. Restoring only touches
+what differs, so going back a few ticks flips just the triggers and gates
+that changed in between.
+"""
+from collections import deque
+from typing import Deque, Optional
+
+# World Snapshot class
+class WorldSnapshot:
+    __slots__ = (
+        "level_index", "state", "completed",
+        "tick", "loop_start_tick", "current_loop", "max_loops", "paused",
+        "player_x", "player_y", "player_direction", "actions",
+        "echoes", "playback", "timeline", "triggers", "loop_start",
+    )
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @property
+    def loop_tick(self) -> int:
+        return self.tick - self.loop_start_tick
+
+# Snapshot History class
+class SnapshotHistory:
+    """The most recent snapshots, oldest dropped first"""
+
+    def __init__(self, capacity: int):
+        self.snapshots: Deque[WorldSnapshot] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self.snapshots)
+
+    def record(self, snapshot: WorldSnapshot):
+        self.snapshots.append(snapshot)
+
+    def rewind(self, ticks: int = 1) -> Optional[WorldSnapshot]:
+        """Drop the last `ticks` snapshots and return the oldest of them"""
+        snapshot = None
+        for _ in range(min(ticks, len(self.snapshots))):
+            snapshot = self.snapshots.pop()
+        return snapshot
+
+    def clear(self):
+        self.snapshots.clear()
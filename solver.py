@@ -0,0 +1,577 @@
+"""Automated solver and solvability checker for levels.
+
+The search works on a tick-exact model of the simulation rules (movement and
+collision, plates, latching switches and terminals, gates, exit) and moves the
+player on a lattice of half-tile steps, starting from the level's start.
+
+Within a loop the player may always stand still, so once a lattice point is
+reached with some set of latched triggers it stays reachable for the rest of
+the loop. Each loop is therefore searched for the earliest arrival at every
+(position, latched triggers) state, and a state reached later than before is
+dominated and dropped. Steps that a closed gate blocks are retried when the
+echoes next change what is active, not every tick.
+
+Echoes only matter through the triggers they hold or use, so each echo loop
+follows a route: the player walks to a trigger, uses it if it is a switch or
+terminal, stays on it if it is a plate, and then either waits there for the
+rest of the loop or leaves at a chosen tick for the next trigger, up to
+`MAX_WAYPOINTS` of them. A loop's worth of echoes reduces to the trigger bits
+they keep active on each tick. More active triggers never block anything, so
+a plan whose echoes keep at least the same triggers active on every tick as
+another's dominates it, and dominated plans are pruned before the next loop is
+added. Loop counts are tried in increasing order, so the first plan found
+uses the fewest loops among the routes searched.
+
+Every plan the search returns is checked by running it through the real
+Simulation, and can be saved as a replay. Independent levels and the plans
+on a search frontier are spread across a process pool:
+
+    python solver.py                   # check every level in levels/
+    python solver.py --workers 8 --replay-dir solutions
+"""
+import argparse
+import os
+import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from level_loader import LevelManager, load_level
+from simulation import (
+    TILE_SIZE, FPS, LOOP_DURATION,
+    Direction, Level, Player, Simulation, TickClock, rects_overlap,
+)
+from spatial import SpatialGrid
+
+# The player moves on a lattice of half tiles
+STEP_PIXELS = TILE_SIZE // 2
+
+# Echo routes visit at most this many triggers, and leave plates on ticks
+# that are multiples of DEPART_TICKS (or straight away)
+MAX_WAYPOINTS = 2
+DEPART_TICKS = FPS
+
+Input = Tuple[Direction, bool]
+NO_INPUT: Input = (Direction.NONE, False)
+MOVE_OFFSETS = {
+    Direction.UP: (0, -1),
+    Direction.DOWN: (0, 1),
+    Direction.LEFT: (-1, 0),
+    Direction.RIGHT: (1, 0),
+}
+
+# A point in a loop: (tick, x, y, latched trigger bits)
+State = Tuple[int, int, int, int]
+# An echo route: (trigger, tick it leaves, or None to stay) per trigger visited
+Route = Tuple[Tuple[int, Optional[int]], ...]
+
+# Echo Field class
+class EchoField:
+    """What the echoes of earlier loops contribute to each tick of a loop"""
+
+    def __init__(self, active: List[int]):
+        self.active = active  # trigger bits held or latched by echoes after each tick
+        # Ticks whose bits differ from the tick before; between them nothing changes
+        self.changes = [tick for tick in range(1, len(active)) if active[tick] != active[tick - 1]]
+
+    def with_echo(self, model: "LevelModel", positions: List[Tuple[int, int]],
+                  interactions: List[Tuple[int, int, int]]) -> "EchoField":
+        active = [mask | model.plates_at(x, y) for mask, (x, y) in zip(self.active, positions)]
+        for tick, x, y in interactions:
+            latched = model.latchables_at(x, y)
+            if latched:
+                for t in range(tick, len(active)):
+                    active[t] |= latched
+        return EchoField(active)
+
+def dominates(active: Sequence[int], other: Sequence[int]) -> bool:
+    """True if `active` keeps every trigger of `other` active on every tick"""
+    return all(mask | theirs == mask for mask, theirs in zip(active, other))
+
+# Level Model class
+class LevelModel:
+    """The rules of one level, reduced to integers and bit masks for search"""
+
+    def __init__(self, level: Level, loop_ticks: int):
+        self.level = level
+        self.loop_ticks = loop_ticks
+        probe = Player(*level.player_start)
+        self.start = level.player_start
+        self.width, self.height, self.speed = probe.width, probe.height, probe.speed
+        self.step_ticks = STEP_PIXELS // self.speed
+
+        self.walls = SpatialGrid(TILE_SIZE)
+        for wall in level.walls:
+            self.walls.insert(wall)
+        # Position -> (plates, latchables, gates overlapped as bits, clear ground, on the exit)
+        self.cells: Dict[Tuple[int, int], Tuple[int, int, int, bool, bool]] = {}
+        self.gate_states: Dict[int, int] = {}  # active trigger bits -> open gate bits
+
+        # Trigger bits: plates first, then switches and terminals (latchable)
+        self.triggers = level.pressure_plates + level.switches + level.terminals
+        self.plate_count = len(level.pressure_plates)
+        self.gates = level.gates
+        self.gate_masks = [sum(1 << i for i, trigger in enumerate(self.triggers) if trigger.target_id == gate.gate_id)
+                           for gate in self.gates]
+        self.exit = level.exit
+
+    def overlapping(self, x: int, y: int, first: int, last: int) -> int:
+        mask = 0
+        for i in range(first, last):
+            t = self.triggers[i]
+            if rects_overlap(x, y, self.width, self.height, t.x, t.y, t.width, t.height):
+                mask |= 1 << i
+        return mask
+
+    def cell(self, x: int, y: int) -> Tuple[int, int, int, bool, bool]:
+        """What a player at (x, y) overlaps; nothing here ever moves, so it is cached"""
+        cell = self.cells.get((x, y))
+        if cell is None:
+            gates = 0
+            for i, gate in enumerate(self.gates):
+                if rects_overlap(x, y, self.width, self.height, gate.x, gate.y, gate.width, gate.height):
+                    gates |= 1 << i
+            ground = (0 <= x <= self.level.width - self.width and 0 <= y <= self.level.height - self.height
+                      and not self.walls.any_overlapping(x, y, self.width, self.height))
+            e = self.exit
+            on_exit = e is not None and rects_overlap(x, y, self.width, self.height, e.x, e.y, e.width, e.height)
+            cell = self.cells[(x, y)] = (self.overlapping(x, y, 0, self.plate_count),
+                                         self.overlapping(x, y, self.plate_count, len(self.triggers)), gates, ground,
+                                         on_exit)
+        return cell
+
+    def plates_at(self, x: int, y: int) -> int:
+        return self.cell(x, y)[0]
+
+    def latchables_at(self, x: int, y: int) -> int:
+        return self.cell(x, y)[1]
+
+    def open_gates(self, active: int) -> int:
+        mask = self.gate_states.get(active)
+        if mask is None:
+            mask = 0
+            for i, gate_mask in enumerate(self.gate_masks):
+                if active & gate_mask:
+                    mask |= 1 << i
+            self.gate_states[active] = mask
+        return mask
+
+    def blocked(self, x: int, y: int, open_gates: int) -> bool:
+        if self.walls.any_overlapping(x, y, self.width, self.height):
+            return True
+        return bool(self.cell(x, y)[2] & ~open_gates)
+
+    def at_exit(self, x: int, y: int) -> bool:
+        return self.cell(x, y)[4]
+
+    def gates_before(self, field: EchoField, tick: int, x: int, y: int, latched: int) -> int:
+        """Gates open when `tick` starts, for a player who was at (x, y) on the tick before.
+        A loop starts with everyone on the start, where the player is at tick 0."""
+        active = self.plates_at(x, y) | latched
+        if tick:
+            active |= field.active[tick - 1]
+        return self.open_gates(active)
+
+    def tick(self, tick: int, x: int, y: int, latched: int, open_gates: int, direction: Direction,
+             interact: bool, field: EchoField):
+        """One Simulation.step, returning (x, y, latched, open gates)"""
+        if interact:
+            latched |= self.latchables_at(x, y)
+
+        if direction is not Direction.NONE:
+            dx, dy = MOVE_OFFSETS[direction]
+            nx, ny = x + dx * self.speed, y + dy * self.speed
+            if not self.blocked(nx, ny, open_gates):
+                x = max(0, min(nx, self.level.width - self.width))
+                y = max(0, min(ny, self.level.height - self.height))
+
+        active = self.plates_at(x, y) | field.active[tick] | latched
+        return x, y, latched, self.open_gates(active)
+
+    def trace(self, inputs: Sequence[Input], field: EchoField):
+        """Positions after every tick of a full loop, and where interactions happened"""
+        x, y = self.start
+        latched, open_gates = 0, self.gates_before(field, 0, x, y, 0)
+        positions, interactions = [], []
+        for tick in range(self.loop_ticks):
+            direction, interact = inputs[tick] if tick < len(inputs) else NO_INPUT
+            if interact:
+                interactions.append((tick, x, y))
+            x, y, latched, open_gates = self.tick(tick, x, y, latched, open_gates, direction, interact, field)
+            positions.append((x, y))
+        return positions, interactions
+
+    def step_from(self, field: EchoField, tick: int, x: int, y: int, latched: int, direction: Direction,
+                  to_exit: bool) -> Optional[Tuple[int, int, bool]]:
+        """The first tick from `tick` on at which a half-tile step goes through, the
+        ticks it takes, and whether it ends on the exit; with `to_exit` the step
+        also counts if it reaches the exit part way"""
+        dx, dy = MOVE_OFFSETS[direction]
+        tx, ty = x + dx * STEP_PIXELS, y + dy * STEP_PIXELS
+        step_ticks, changes = self.step_ticks, field.changes
+        if not self.cell(tx, ty)[3] or tick + step_ticks > self.loop_ticks:
+            return None
+
+        # The player sweeps the rectangle between where it starts and where it
+        # ends, so what the step crosses on the way it also overlaps at one end:
+        # walls can't stop it part way, and without gates at either end
+        # nothing can
+        dx, dy = dx * self.speed, dy * self.speed
+        if not (self.cell(x, y)[2] | self.cell(tx, ty)[2]):
+            if to_exit and self.at_exit(tx, ty):
+                offset = next(offset for offset in range(step_ticks)
+                              if self.at_exit(x + dx * (offset + 1), y + dy * (offset + 1)))
+                return tick, offset + 1, True
+            return tick, step_ticks, False
+
+        active = field.active
+        while tick + step_ticks <= self.loop_ticks:
+            open_gates = self.gates_before(field, tick, x, y, latched)
+            nx, ny = x, y
+            for offset in range(step_ticks):
+                px, py = nx + dx, ny + dy
+                plates, _, gates, _, _ = self.cell(px, py)
+                if not gates & ~open_gates:
+                    nx, ny = px, py
+                else:
+                    plates = self.cell(nx, ny)[0]
+                open_gates = self.open_gates(plates | active[tick + offset] | latched)
+                if to_exit and self.at_exit(nx, ny):
+                    return tick, offset + 1, True
+            if (nx, ny) == (tx, ty):
+                return tick, step_ticks, False
+
+            # Blocked part way by a gate: the step plays out the same until the
+            # echoes change what is active during it
+            if tick == 0:
+                tick = 1
+                continue
+            following = bisect_right(changes, tick - 1)
+            if following == len(changes):
+                return None
+            tick = max(tick + 1, changes[following] - step_ticks + 2)
+        return None
+
+    def explore(self, field: EchoField, start: State, targets: int = 0, to_exit: bool = False):
+        """Earliest arrival at the (x, y, latched) states reachable from `start`.
+
+        Stops early once every trigger in `targets` has been stood on or used,
+        or with `to_exit` once the exit is reached. Returns the arrival ticks
+        and parent links to rebuild inputs with `inputs_to`, the first state
+        reaching each target trigger, and with `to_exit` the earliest way onto
+        the exit as (state, departure tick, inputs), or None.
+        """
+        tick, x, y, latched = start
+        arrivals = {(x, y, latched): tick}
+        parents = {(x, y, latched): None}
+        heap = [start]
+        firsts: Dict[int, Tuple[int, int, int]] = {}
+        missing = targets
+        exit_way, exit_tick = None, self.loop_ticks
+
+        while heap:
+            tick, x, y, latched = heappop(heap)
+            node = (x, y, latched)
+            if arrivals[node] < tick:
+                continue
+            if tick >= exit_tick:
+                break
+
+            reached = (self.plates_at(x, y) | latched) & missing
+            if reached:
+                missing &= ~reached
+                while reached:
+                    bit = reached & -reached
+                    reached ^= bit
+                    firsts[bit.bit_length() - 1] = node
+                if not missing:
+                    break
+
+            edges = []
+            gained = self.latchables_at(x, y) & ~(latched | (field.active[tick] if tick < self.loop_ticks else 0))
+            if gained and tick < self.loop_ticks:
+                edges.append((tick, 1, [(Direction.NONE, True)], x, y, latched | gained))
+            for direction, (dx, dy) in MOVE_OFFSETS.items():
+                step = self.step_from(field, tick, x, y, latched, direction, to_exit)
+                if step is None:
+                    continue
+                depart, taken, exited = step
+                inputs = [(direction, False)] * taken
+                if exited:
+                    if depart + taken < exit_tick:
+                        exit_way, exit_tick = (node, depart, inputs), depart + taken
+                    continue
+                edges.append((depart, taken, inputs, x + dx * STEP_PIXELS, y + dy * STEP_PIXELS, latched))
+
+            for depart, taken, inputs, nx, ny, n_latched in edges:
+                child = (nx, ny, n_latched)
+                arrival = depart + taken
+                if arrival < arrivals.get(child, self.loop_ticks + 1):
+                    arrivals[child] = arrival
+                    parents[child] = (node, depart, inputs)
+                    heappush(heap, (arrival, nx, ny, n_latched))
+
+        return arrivals, parents, firsts, exit_way
+
+    def inputs_to(self, arrivals: Dict, parents: Dict, node: Tuple[int, int, int]) -> List[Input]:
+        """Inputs from the start of the search to `node`, standing still while waiting"""
+        legs = []
+        while parents[node] is not None:
+            previous, depart, inputs = parents[node]
+            legs.append([NO_INPUT] * (depart - arrivals[previous]) + inputs)
+            node = previous
+        return [entry for leg in reversed(legs) for entry in leg]
+
+    def exit_inputs(self, field: EchoField) -> Optional[List[Input]]:
+        """Inputs that take the player from the start to the exit within a loop"""
+        arrivals, parents, _, exit_way = self.explore(field, (0, self.start[0], self.start[1], 0), to_exit=True)
+        if exit_way is None:
+            return None
+        node, depart, inputs = exit_way
+        return self.inputs_to(arrivals, parents, node) + [NO_INPUT] * (depart - arrivals[node]) + inputs
+
+    def trigger_arrivals(self, field: EchoField, start: State) -> Dict[int, Tuple[State, List[Input]]]:
+        """For every trigger, the earliest state standing on it (plates) or having
+        used it (switches and terminals), and the inputs from `start` to it"""
+        arrivals, parents, firsts, _ = self.explore(field, start, targets=(1 << len(self.triggers)) - 1)
+        return {trigger: ((arrivals[node], *node), self.inputs_to(arrivals, parents, node))
+                for trigger, node in sorted(firsts.items())}
+
+    def routes(self, field: EchoField) -> List[Tuple[Route, List[Input]]]:
+        """Every echo route through up to MAX_WAYPOINTS triggers, with its inputs"""
+        found = []
+        memo: Dict[State, Dict] = {}
+
+        def extend(route: Route, state: State, inputs: List[Input]):
+            if state not in memo:
+                memo[state] = self.trigger_arrivals(field, state)
+            for trigger, (arrival, leg) in memo[state].items():
+                if route and route[-1][0] == trigger:
+                    continue
+                tick, x, y, latched = arrival
+                found.append((route + ((trigger, None),), inputs + leg))
+                if len(route) + 1 == MAX_WAYPOINTS:
+                    continue
+                if trigger >= self.plate_count:
+                    # A switch or terminal stays latched, so leave at once
+                    leaves = [tick]
+                else:
+                    leaves = [tick] + list(range((tick // DEPART_TICKS + 1) * DEPART_TICKS, self.loop_ticks,
+                                                 DEPART_TICKS))
+                for leave in leaves:
+                    extend(route + ((trigger, leave),), (leave, x, y, latched),
+                           inputs + leg + [NO_INPUT] * (leave - tick))
+
+        extend((), (0, self.start[0], self.start[1], 0), [])
+        return found
+
+    def route_inputs(self, field: EchoField, route: Route) -> Optional[List[Input]]:
+        """Inputs that follow one echo route, or None if it cannot be followed"""
+        state: State = (0, self.start[0], self.start[1], 0)
+        inputs: List[Input] = []
+        for trigger, leave in route:
+            found = self.trigger_arrivals(field, state).get(trigger)
+            if found is None:
+                return None
+            (tick, x, y, latched), leg = found
+            inputs += leg
+            if leave is not None:
+                if leave < tick:
+                    return None
+                inputs += [NO_INPUT] * (leave - tick)
+                tick = leave
+            state = (tick, x, y, latched)
+        return inputs
+
+# Solution class
+class Solution:
+    def __init__(self, level_number: int, loops: List[List[Input]], plan: Tuple[Route, ...]):
+        self.level_number = level_number
+        self.loops = loops  # per-loop inputs; all but the last run to the loop reset
+        self.plan = plan  # the route each echo followed
+
+    @property
+    def loop_count(self) -> int:
+        return len(self.loops)
+
+    def describe(self) -> str:
+        routes = [" -> ".join(f"trigger {trigger}" + ("" if leave is None else f" until tick {leave}")
+                              for trigger, leave in route) for route in self.plan]
+        return "; ".join(f"echo {i + 1}: {route}" for i, route in enumerate(routes)) or "no echoes"
+
+    def simulate(self, level_manager: LevelManager) -> Simulation:
+        """Run the solution through the real simulation"""
+        sim = Simulation(level_manager)
+        loop_ticks = sim.timer_manager.loop_ticks
+        for inputs in self.loops[:-1]:
+            sim.run(list(inputs) + [NO_INPUT] * (loop_ticks - len(inputs)))
+        sim.run(self.loops[-1])
+        return sim
+
+    def save_replay(self, path: str, level_manager: LevelManager):
+        from replay import save_simulation
+        save_simulation(path, self.simulate(level_manager))
+
+# Plan evaluation, memoized per process for the length of one solve() call;
+# in-memory levels are keyed by id(), so the caches must not outlive it
+_models: Dict[str, LevelModel] = {}
+_prefixes: Dict[Tuple, Optional[Tuple[EchoField, List[List[Input]]]]] = {}
+
+def loop_ticks_for_game() -> int:
+    return TickClock(FPS).to_ticks(LOOP_DURATION)
+
+def model_for(source) -> LevelModel:
+    """Source is a level file path or an in-memory Level"""
+    key = source if isinstance(source, str) else id(source)
+    model = _models.get(key)
+    if model is None:
+        level = load_level(source) if isinstance(source, str) else source
+        model = _models[key] = LevelModel(level, loop_ticks_for_game())
+    return model
+
+def echo_prefix(source, plan: Tuple[Route, ...]):
+    """Echo field and echo-loop inputs for a plan, or None if a route cannot be followed"""
+    key = (source if isinstance(source, str) else id(source), plan)
+    if key in _prefixes:
+        return _prefixes[key]
+
+    model = model_for(source)
+    if not plan:
+        result = (EchoField([0] * model.loop_ticks), [])
+    else:
+        previous = echo_prefix(source, plan[:-1])
+        result = None
+        if previous is not None:
+            field, loops = previous
+            inputs = model.route_inputs(field, plan[-1])
+            if inputs is not None:
+                positions, interactions = model.trace(inputs, field)
+                result = (field.with_echo(model, positions, interactions), loops + [inputs])
+    _prefixes[key] = result
+    return result
+
+def evaluate_plan(job) -> Optional[List[List[Input]]]:
+    """Inputs of every loop if the final loop can reach the exit after the plan's echoes"""
+    source, plan = job
+    prefix = echo_prefix(source, plan)
+    if prefix is None:
+        return None
+    field, loops = prefix
+    final = model_for(source).exit_inputs(field)
+    return None if final is None else loops + [final]
+
+def expand_plan(job) -> List[Tuple[Tuple[Route, ...], List[int]]]:
+    """Every plan with one more echo route, and the trigger bits its echoes keep active"""
+    source, plan = job
+    prefix = echo_prefix(source, plan)
+    if prefix is None:
+        return []
+    model = model_for(source)
+    field, loops = prefix
+    children = []
+    for route, inputs in model.routes(field):
+        positions, interactions = model.trace(inputs, field)
+        child = field.with_echo(model, positions, interactions)
+        key = (source if isinstance(source, str) else id(source), plan + (route,))
+        _prefixes[key] = (child, loops + [inputs])
+        children.append((plan + (route,), child.active))
+    return children
+
+def prune(children: List[Tuple[Tuple[Route, ...], List[int]]], kept: List[List[int]]) -> List[Tuple[Route, ...]]:
+    """Plans whose echoes are not dominated by an earlier plan's; `kept` collects their fields"""
+    # A dominating field has at least as many active bits, so it comes first
+    children = sorted(children, key=lambda child: -sum(bin(mask).count("1") for mask in child[1]))
+    plans = []
+    for plan, active in children:
+        if not any(dominates(other, active) for other in kept):
+            kept.append(active)
+            plans.append(plan)
+    return plans
+
+def solve(sources: Sequence, workers: int = 1) -> List[Optional[Solution]]:
+    """Find a minimal-loop solution for every level source (file path or Level)"""
+    # Worker processes keep their own caches, which go with the pool
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+
+    def run(function, jobs):
+        if pool is not None:
+            return list(pool.map(function, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        return [function(job) for job in jobs]
+
+    try:
+        models = [model_for(source) for source in sources]
+        solutions: List[Optional[Solution]] = [None] * len(sources)
+        # Per unsolved level, the plans for the echoes so far and every field seen
+        frontiers = {i: [()] for i in range(len(sources))}
+        kept = {i: [[0] * models[i].loop_ticks] for i in range(len(sources))}
+
+        loops = 1
+        while frontiers:
+            # One batch tries the final loop after every frontier plan of every unsolved level
+            owners = [(i, plan) for i, plans in frontiers.items() for plan in plans]
+            jobs = [(sources[i], plan) for i, plan in owners]
+            for (i, plan), found in zip(owners, run(evaluate_plan, jobs)):
+                if found is not None and solutions[i] is None:
+                    solutions[i] = Solution(models[i].level.level_number, found, plan)
+            for i in list(frontiers):
+                if solutions[i] is not None or loops >= models[i].level.max_loops:
+                    del frontiers[i]
+            if not frontiers:
+                break
+
+            # The next batch adds one echo route to each of them
+            owners = [(i, plan) for i, plans in frontiers.items() for plan in plans]
+            jobs = [(sources[i], plan) for i, plan in owners]
+            children: Dict[int, List] = {i: [] for i in frontiers}
+            for (i, _), expanded in zip(owners, run(expand_plan, jobs)):
+                children[i].extend(expanded)
+            for i in list(frontiers):
+                frontiers[i] = prune(children[i], kept[i])
+                if not frontiers[i]:
+                    del frontiers[i]
+            loops += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _models.clear()
+        _prefixes.clear()
+
+    return solutions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check that every level can be solved within its loop limit")
+    parser.add_argument("levels", nargs="*", help="level files (default: every file in levels/)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--replay-dir", help="save each solution as a replay in this directory")
+    args = parser.parse_args(argv)
+
+    paths = args.levels or LevelManager().level_paths
+    solutions = solve(paths, args.workers)
+
+    failures = 0
+    for path, solution in zip(paths, solutions):
+        name = os.path.basename(path)
+        if solution is None:
+            failures += 1
+            print(f"{name}: no solution found within {load_level(path).max_loops} loops "
+                  f"(echo routes through up to {MAX_WAYPOINTS} triggers)")
+            continue
+
+        manager = LevelManager.from_levels([load_level(path)])
+        sim = solution.simulate(manager)
+        if sim.state != "level_complete":
+            failures += 1
+            print(f"{name}: solver plan did not complete the level in the simulation ({solution.describe()})")
+            continue
+
+        print(f"{name}: solved in {solution.loop_count} loop(s), {solution.describe()}")
+        if args.replay_dir:
+            os.makedirs(args.replay_dir, exist_ok=True)
+            replay_path = os.path.join(args.replay_dir, os.path.splitext(name)[0] + ".eocr")
+            solution.save_replay(replay_path, LevelManager.from_levels([load_level(path)]))
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Uniform-grid spatial index.
+
+Objects (anything with x, y, width and height) are bucketed into every cell
+their rectangle touches, so a query only looks at the handful of objects near
+the queried rectangle however large the level is.
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+
+def rects_overlap(ax: int, ay: int, aw: int, ah: int, bx: int, by: int, bw: int, bh: int) -> bool:
+    """Axis-aligned overlap test with the same semantics as pygame.Rect.colliderect"""
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+# Spatial Grid class
+class SpatialGrid:
+    def __init__(self, cell_size: int):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List] = {}
+
+    def cell_keys(self, x: int, y: int, width: int, height: int):
+        size = self.cell_size
+        for cx in range(x // size, (x + width - 1) // size + 1):
+            for cy in range(y // size, (y + height - 1) // size + 1):
+                yield cx, cy
+
+    def insert(self, obj):
+        for key in self.cell_keys(obj.x, obj.y, obj.width, obj.height):
+            self.cells.setdefault(key, []).append(obj)
+
+    def remove(self, obj):
+        for key in self.cell_keys(obj.x, obj.y, obj.width, obj.height):
+            bucket = self.cells.get(key)
+            if bucket is not None and obj in bucket:
+                bucket.remove(obj)
+                if not bucket:
+                    del self.cells[key]
+
+    def query(self, x: int, y: int, width: int, height: int) -> List:
+        """Objects sharing a cell with the rectangle; they may not overlap it"""
+        found = {}
+        cells = self.cells
+        for key in self.cell_keys(x, y, width, height):
+            bucket = cells.get(key)
+            if bucket:
+                for obj in bucket:
+                    found[id(obj)] = obj
+        return list(found.values())
+
+    def find_overlapping(self, x: int, y: int, width: int, height: int) -> List:
+        return [obj for obj in self.query(x, y, width, height)
+                if rects_overlap(x, y, width, height, obj.x, obj.y, obj.width, obj.height)]
+
+    def overlapped_by(self, movers: Iterable) -> Set[int]:
+        """ids of the indexed objects that overlap at least one of `movers`.
+
+        One cell lookup per mover, however many objects are indexed, so it
+        suits many moving things tested against a few fixed ones.
+        """
+        found = set()
+        cells = self.cells
+        if not cells:
+            return found
+        size = self.cell_size
+        for mover in movers:
+            x, y, width, height = mover.x, mover.y, mover.width, mover.height
+            for cx in range(x // size, (x + width - 1) // size + 1):
+                for cy in range(y // size, (y + height - 1) // size + 1):
+                    for obj in cells.get((cx, cy), ()):
+                        if rects_overlap(x, y, width, height, obj.x, obj.y, obj.width, obj.height):
+                            found.add(id(obj))
+        return found
+
+    def any_overlapping(self, x: int, y: int, width: int, height: int) -> bool:
+        cells = self.cells
+        for key in self.cell_keys(x, y, width, height):
+            for obj in cells.get(key, ()):
+                if rects_overlap(x, y, width, height, obj.x, obj.y, obj.width, obj.height):
+                    return True
+        return False
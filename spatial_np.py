@@ -0,0 +1,16 @@
+"""NumPy versions of the rectangle tests in spatial.py, for many bodies at once.
+
+Kept apart from spatial.py so that importing the simulation does not load
+NumPy; only the echo timeline and the vectorised environment need these.
+"""
+import numpy as np
+
+def rect_array(objects) -> np.ndarray:
+    """(count, 4) array of x, y, width, height"""
+    return np.array([(o.x, o.y, o.width, o.height) for o in objects], dtype=np.int32).reshape(-1, 4)
+
+def overlaps(x: np.ndarray, y: np.ndarray, width: int, height: int, rects: np.ndarray) -> np.ndarray:
+    """Overlap of bodies at x, y (any shape) against rects; adds a trailing rect axis"""
+    x, y = x[..., None], y[..., None]
+    return ((x < rects[:, 0] + rects[:, 2]) & (x + width > rects[:, 0])
+            & (y < rects[:, 1] + rects[:, 3]) & (y + height > rects[:, 1]))
@@ -0,0 +1,79 @@
+import random
+import unittest
+
+from actionlog import HOLD
+from level_loader import LevelManager, load_level
+from playback import EchoPlayback
+from simulation import DIRECTIONS, Direction, Level, Simulation
+
+def open_level() -> Level:
+    """No walls and no exit, so the player runs into the edges of the world"""
+    return Level(80, (100, 300), 3)
+
+def walled_level() -> Level:
+    return load_level(LevelManager().level_paths[0])
+
+def random_walk(rng: random.Random, ticks: int):
+    """Runs of one input, as a player holding keys would give"""
+    inputs = []
+    while len(inputs) < ticks:
+        entry = (rng.choice(DIRECTIONS), rng.random() < 0.1)
+        inputs += [entry] + [(entry[0], False)] * rng.randrange(40)
+    return inputs[:ticks]
+
+def record(level: Level, inputs):
+    """Play inputs within one loop; returns the simulation and the position
+    after every tick, which is what a per-tick log held"""
+    sim = Simulation(LevelManager.from_levels([level]))
+    positions = []
+    for direction, interact in inputs:
+        sim.step(direction, interact)
+        positions.append((sim.player.x, sim.player.y))
+    return sim, positions
+
+def replayed(actions, start, ticks: int):
+    playback = EchoPlayback()
+    playback.add(actions, start)
+    return [tuple(position) for position in playback.trajectory(0, ticks).tolist()]
+
+class KeyframeRecordingTest(unittest.TestCase):
+    def test_keyframes_replay_every_tick(self):
+        for make_level in (open_level, walled_level):
+            for seed in range(5):
+                with self.subTest(level=make_level.__name__, seed=seed):
+                    level = make_level()
+                    sim, positions = record(level, random_walk(random.Random(seed), 500))
+                    actions = sim.player.actions
+                    self.assertLess(len(actions), len(positions))
+                    self.assertEqual(replayed(actions.view(), level.player_start, len(positions)), positions)
+                    compacted = actions.compacted()
+                    self.assertLessEqual(len(compacted), len(actions))
+                    self.assertEqual(replayed(compacted.view(), level.player_start, len(positions)), positions)
+
+    def test_pushing_against_the_edge_becomes_one_hold(self):
+        level = open_level()
+        inputs = [(Direction.LEFT, False)] * 200 + [(Direction.DOWN, False)] * 30
+        sim, positions = record(level, inputs)
+        compacted = sim.player.actions.compacted()
+        # The walk to the edge, the pushing against it and the walk down
+        self.assertEqual(list(compacted.types), [0, HOLD, 0])
+        self.assertEqual(replayed(compacted.view(), level.player_start, len(positions)), positions)
+
+    def test_echo_retraces_the_loop(self):
+        level = walled_level()
+        sim = Simulation(LevelManager.from_levels([level]))
+        loop_ticks = sim.timer_manager.loop_ticks
+        positions = []
+        for direction, interact in random_walk(random.Random(7), loop_ticks - 1):
+            sim.step(direction, interact)
+            positions.append((sim.player.x, sim.player.y))
+        sim.step(Direction.NONE)
+        self.assertEqual(len(sim.echoes), 1)
+
+        echo = sim.echoes[0]
+        for expected in positions:
+            sim.step(Direction.NONE)
+            self.assertEqual((echo.x, echo.y), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from level_loader import LevelManager, TRIGGER_KINDS, build_level, cache_path_for, compile_level, load_level, parse_level
+from simulation import Level
+
+# Every kind of object, several triggers on one gate and a gate with two halves
+MIXED_LEVEL = {
+    "level_number": 7,
+    "player_start": [60, 60],
+    "max_loops": 5,
+    "size": [1200, 900],
+    "walls": [[0, 0, 1200, 20], [0, 880, 1200, 20], [500, 20, 20, 400], [500, 520, 20, 360]],
+    "switches": [[100, 700, 1], [900, 100, 3]],
+    "pressure_plates": [[300, 300, 1], [700, 700, 2]],
+    "terminals": [[300, 600, 2]],
+    "gates": [[500, 420, 20, 100, 1], [800, 20, 20, 430, 2], [800, 450, 20, 430, 2], [1000, 20, 20, 860, 3]],
+    "exit": [1100, 450],
+}
+
+def describe(level: Level):
+    """Everything a compiled level has to reproduce, as plain values"""
+    def rect(obj):
+        return type(obj).__name__, obj.x, obj.y, obj.width, obj.height
+    return {
+        "level": (level.level_number, tuple(level.player_start), level.max_loops, level.width, level.height),
+        "walls": [rect(wall) for wall in level.walls],
+        "triggers": {kind: [(*rect(t), t.target_id, t.level is level) for t in getattr(level, kind)]
+                     for kind in TRIGGER_KINDS},
+        "gates": [(*rect(gate), gate.gate_id, gate.blockers is level.blockers) for gate in level.gates],
+        "exit": rect(level.exit) if level.exit else None,
+        "blocker_cells": {key: sorted(rect(obj) for obj in bucket) for key, bucket in level.blockers.cells.items()},
+        "triggers_by_target": {target: [rect(t) for t in triggers]
+                               for target, triggers in level.triggers_by_target.items()},
+        "gates_by_target": {target: [rect(g) for g in gates] for target, gates in level.gates_by_target.items()},
+    }
+
+class CompiledLevelTest(unittest.TestCase):
+    def test_compiled_level_matches_parsed(self):
+        sources = [MIXED_LEVEL]
+        for path in LevelManager().level_paths:
+            with open(path) as f:
+                sources.append(json.load(f))
+        for data in sources:
+            with self.subTest(level=data["level_number"]):
+                compiled = pickle.loads(pickle.dumps(compile_level(parse_level(data))))
+                self.assertEqual(describe(build_level(compiled)), describe(parse_level(data)))
+
+    def test_compiled_triggers_open_their_gates(self):
+        level = build_level(compile_level(parse_level(MIXED_LEVEL)))
+        for trigger in level.get_interactive_objects():
+            trigger.activate()
+            level.update_gates()
+            self.assertEqual([gate.is_open for gate in level.gates],
+                             [gate.gate_id == trigger.target_id for gate in level.gates])
+            trigger.set_active(False)
+            level.update_gates()
+
+class LevelCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "level.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_level(self, data, mtime_ns=None):
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def mark_cache(self):
+        """Change the cached copy only, so a load shows where it came from"""
+        cache_path = cache_path_for(self.path)
+        with open(cache_path, "rb") as f:
+            compiled = pickle.load(f)
+        compiled["max_loops"] = 99
+        with open(cache_path, "wb") as f:
+            pickle.dump(compiled, f)
+
+    def test_fresh_cache_is_used(self):
+        self.write_level(MIXED_LEVEL)
+        self.assertEqual(load_level(self.path).max_loops, 5)
+        self.assertTrue(os.path.exists(cache_path_for(self.path)))
+        self.mark_cache()
+        self.assertEqual(load_level(self.path).max_loops, 99)
+        self.assertEqual(load_level(self.path, use_cache=False).max_loops, 5)
+
+    def test_cache_is_stale_after_size_change(self):
+        self.write_level(MIXED_LEVEL, mtime_ns=1_000_000_000)
+        load_level(self.path)
+        self.mark_cache()
+        # Same mtime, different size
+        self.write_level(dict(MIXED_LEVEL, max_loops=12), mtime_ns=1_000_000_000)
+        self.assertEqual(load_level(self.path).max_loops, 12)
+
+    def test_cache_is_stale_after_mtime_change(self):
+        self.write_level(MIXED_LEVEL, mtime_ns=1_000_000_000)
+        load_level(self.path)
+        self.mark_cache()
+        # Same size, different mtime
+        self.write_level(dict(MIXED_LEVEL, max_loops=6), mtime_ns=2_000_000_000)
+        self.assertEqual(load_level(self.path).max_loops, 6)
+
+if __name__ == "__main__":
+    unittest.main()
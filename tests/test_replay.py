@@ -0,0 +1,83 @@
+import os
+import random
+import tempfile
+import unittest
+
+from level_loader import LevelManager
+from playback import EchoPlayback
+from replay import HEADER, MAGIC, VERSION, ReplayFile, save_simulation
+from simulation import DIRECTIONS, Direction, Simulation
+
+def world_state(sim: Simulation):
+    return (sim.tick, sim.state, (sim.player.x, sim.player.y), [(echo.x, echo.y) for echo in sim.echoes],
+            [trigger.is_active for trigger in sim.get_current_level().get_interactive_objects()])
+
+def random_inputs(rng: random.Random, count: int, idle_tail: int):
+    inputs = [(rng.choice(DIRECTIONS), rng.random() < 0.05) for _ in range(count)]
+    return inputs + [(Direction.NONE, False)] * idle_tail
+
+class ReplayRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run.eocr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def round_trip(self, sim: Simulation) -> Simulation:
+        save_simulation(self.path, sim)
+        with ReplayFile(self.path) as replay:
+            return replay.resimulate(LevelManager())
+
+    def test_resimulated_run_matches(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                sim = Simulation(LevelManager())
+                sim.run(random_inputs(rng, rng.randrange(200, 1400), 0))
+                self.assertEqual(world_state(self.round_trip(sim)), world_state(sim))
+
+    def test_idle_ticks_at_the_end_are_kept(self):
+        sim = Simulation(LevelManager())
+        sim.run(random_inputs(random.Random(1), 700, 150))
+        self.assertEqual(world_state(self.round_trip(sim)), world_state(sim))
+
+class ReplayFileTest(unittest.TestCase):
+    def test_echoes_load_as_recorded(self):
+        sim = Simulation(LevelManager())
+        # Two finished loops and a live one that stops on a recorded move
+        inputs = random_inputs(random.Random(3), 1300, 0)
+        inputs[-1] = (Direction.UP, False)
+        sim.run(inputs)
+        self.assertEqual(sim.state, "playing")
+
+        recorded = EchoPlayback()
+        for actions in [echo.actions for echo in sim.echoes] + [sim.player.actions.view()]:
+            recorded.add(actions, sim.get_current_level().player_start)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.eocr")
+            save_simulation(path, sim)
+            with ReplayFile(path) as replay:
+                loaded = EchoPlayback()
+                replay.load_echoes(loaded)
+                self.assertEqual(replay.loop_count, 3)
+                for index in range(replay.loop_count):
+                    self.assertEqual(loaded.trajectory(index, replay.loop_ticks).tolist(),
+                                     recorded.trajectory(index, replay.loop_ticks).tolist())
+
+    def test_unknown_version_is_rejected(self):
+        sim = Simulation(LevelManager())
+        sim.run(random_inputs(random.Random(4), 100, 0))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.eocr")
+            save_simulation(path, sim)
+            with open(path, "r+b") as f:
+                fields = HEADER.unpack(f.read(HEADER.size))
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, VERSION + 1, *fields[2:]))
+            with self.assertRaises(ValueError):
+                ReplayFile(path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import random
+import unittest
+
+from fuzz import RandomPilot
+from level_loader import LevelManager, load_level
+from simulation import Simulation
+
+def new_simulation() -> Simulation:
+    """The level with a terminal and a plate, so echoes have triggers to hold"""
+    return Simulation(LevelManager.from_levels([load_level(LevelManager().level_paths[1])]))
+
+def world_state(sim: Simulation):
+    level = sim.get_current_level()
+    return (sim.tick, sim.state, sim.timer_manager.current_loop, (sim.player.x, sim.player.y),
+            [(echo.x, echo.y) for echo in sim.echoes], [gate.is_open for gate in level.gates],
+            [trigger.is_active for trigger in level.get_interactive_objects()], len(sim.player.actions))
+
+def pilot_inputs(sim: Simulation, seed: int, ticks: int):
+    """Play `ticks` ticks of a random pilot; returns the inputs, the snapshot
+    taken before each tick and the world state after it"""
+    pilot = RandomPilot(seed, sim.get_current_level(), 0.7, 0.1)
+    inputs, snapshots, states = [], [], []
+    for _ in range(ticks):
+        if sim.state != "playing":
+            break
+        entry = pilot.next(sim.player)
+        snapshots.append(sim.snapshot())
+        sim.step(*entry)
+        inputs.append(entry)
+        states.append(world_state(sim))
+    return inputs, snapshots, states
+
+class SnapshotRestoreTest(unittest.TestCase):
+    def assert_restep_matches(self, sim: Simulation, inputs, snapshots, states, starts, window=None):
+        """Restore each start in turn and re-step to the end, or for `window` ticks"""
+        for start in starts:
+            with self.subTest(start=start):
+                sim.restore(snapshots[start])
+                end = len(inputs) if window is None else min(start + window, len(inputs))
+                for tick in range(start, end):
+                    sim.step(*inputs[tick])
+                    self.assertEqual(world_state(sim), states[tick], f"tick {tick}")
+
+    def test_restore_and_restep_across_loop_resets(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                sim = new_simulation()
+                loop_ticks = sim.timer_manager.loop_ticks
+                inputs, snapshots, states = pilot_inputs(sim, seed, loop_ticks * 2 + 200)
+                self.assertGreaterEqual(states[-1][2], 3)
+                # Later starts first, so each restore also goes back past the last one
+                starts = [loop_ticks * 2 + 50, loop_ticks * 2 - 1, loop_ticks + 300, loop_ticks - 5, 0]
+                self.assert_restep_matches(sim, inputs, snapshots, states, starts)
+                # Short re-steps from all over the run, in random order
+                starts = list(range(0, len(inputs), 7))
+                random.Random(seed).shuffle(starts)
+                self.assert_restep_matches(sim, inputs, snapshots, states, starts, window=40)
+
+    def test_restore_with_history_budget(self):
+        sim = new_simulation()
+        sim.history_budget = 60
+        loop_ticks = sim.timer_manager.loop_ticks
+        inputs, snapshots, states = pilot_inputs(sim, 4, loop_ticks * 3 + 100)
+        self.assertEqual(states[-1][2], 4)
+        # Some echoes were dropped to keep within the budget
+        self.assertLess(len(sim.echoes), 3)
+        starts = [loop_ticks * 3 + 20, loop_ticks * 2 + 10, loop_ticks - 1, 30]
+        self.assert_restep_matches(sim, inputs, snapshots, states, starts)
+        self.assert_restep_matches(sim, inputs, snapshots, states, range(len(inputs) - 1, 0, -11), window=40)
+
+    def test_restart_loop(self):
+        sim = new_simulation()
+        loop_ticks = sim.timer_manager.loop_ticks
+        inputs, snapshots, states = pilot_inputs(sim, 5, loop_ticks + 250)
+        # The snapshot before the first tick of the second loop is its start
+        loop_start = loop_ticks
+        self.assertEqual(world_state(sim)[2], 2)
+
+        sim.restore(snapshots[loop_start])
+        expected = world_state(sim)
+        sim.restore(snapshots[-1])
+        sim.restart_loop()
+        self.assertEqual(world_state(sim), expected)
+
+        for tick in range(loop_start, len(inputs)):
+            sim.step(*inputs[tick])
+            self.assertEqual(world_state(sim), states[tick], f"tick {tick}")
+
+        # Restarting twice in a row stays at the same loop start
+        sim.restart_loop()
+        sim.restart_loop()
+        self.assertEqual(world_state(sim), expected)
+
+        # After going back into the first loop, a restart goes to its start
+        sim.restore(snapshots[0])
+        first_start = world_state(sim)
+        sim.restore(snapshots[200])
+        sim.restart_loop()
+        self.assertEqual(world_state(sim), first_start)
+
+if __name__ == "__main__":
+    unittest.main()
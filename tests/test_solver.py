@@ -0,0 +1,77 @@
+import unittest
+
+from level_loader import LevelManager, load_level
+from simulation import Level
+import solver
+
+def open_room(level_number: int, max_loops: int) -> Level:
+    level = Level(level_number, (100, 300), max_loops)
+    for wall in [(0, 0, 800, 20), (0, 580, 800, 20), (0, 0, 20, 600), (780, 0, 20, 600)]:
+        level.add_wall(*wall)
+    level.set_exit(700, 300)
+    return level
+
+def two_phase_level() -> Level:
+    """One echo has to hold the first plate and then move on to the second"""
+    level = open_room(90, 2)
+    level.add_pressure_plate(100, 100, 1)
+    level.add_pressure_plate(100, 500, 2)
+    level.add_gate(300, 20, 20, 560, 1)
+    level.add_gate(500, 20, 20, 560, 2)
+    return level
+
+def side_by_side_level() -> Level:
+    """Two gates next to each other need two echoes on their plates at once"""
+    level = open_room(91, 3)
+    level.add_pressure_plate(100, 100, 1)
+    level.add_pressure_plate(100, 500, 2)
+    level.add_gate(300, 20, 20, 560, 1)
+    level.add_gate(320, 20, 20, 560, 2)
+    return level
+
+def terminal_level() -> Level:
+    """An echo uses a terminal, then holds a plate"""
+    level = open_room(92, 2)
+    level.add_terminal(100, 100, 1)
+    level.add_pressure_plate(100, 500, 2)
+    level.add_gate(300, 20, 20, 560, 1)
+    level.add_gate(320, 20, 20, 560, 2)
+    return level
+
+class SolverTest(unittest.TestCase):
+    def assert_completes(self, make_level, solution: solver.Solution):
+        sim = solution.simulate(LevelManager.from_levels([make_level()]))
+        self.assertEqual(sim.state, "level_complete", solution.describe())
+
+    def test_solutions_complete_in_simulation(self):
+        paths = LevelManager().level_paths
+        makers = [lambda path=path: load_level(path) for path in paths]
+        makers += [two_phase_level, side_by_side_level, terminal_level]
+        for make_level, solution in zip(makers, solver.solve([make_level() for make_level in makers])):
+            with self.subTest(level=make_level().level_number):
+                self.assertIsNotNone(solution)
+                self.assert_completes(make_level, solution)
+
+    def test_echo_visits_two_plates_in_turn(self):
+        solution = solver.solve([two_phase_level()])[0]
+        self.assertIsNotNone(solution)
+        self.assertEqual(solution.loop_count, 2)
+        self.assertEqual(len(solution.plan[0]), 2)
+        self.assert_completes(two_phase_level, solution)
+
+    def test_fewest_loops(self):
+        solution = solver.solve([side_by_side_level()])[0]
+        self.assertEqual(solution.loop_count, 3)
+
+    def test_unsolvable_within_loop_limit(self):
+        level = side_by_side_level()
+        level.max_loops = 2
+        self.assertIsNone(solver.solve([level])[0])
+
+    def test_caches_are_cleared_after_solving(self):
+        solver.solve([two_phase_level()])
+        self.assertEqual(solver._models, {})
+        self.assertEqual(solver._prefixes, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from fuzz import RandomPilot
+from level_loader import LevelManager, load_level
+from simulation import Simulation
+from vector_env import VectorEnv
+
+SEEDS = range(6)
+
+def sim_state(sim: Simulation):
+    """Player position, loop tick, loop index, triggers in VectorEnv's order, gates"""
+    level = sim.get_current_level()
+    timer_manager = sim.timer_manager
+    triggers = level.pressure_plates + level.switches + level.terminals
+    return ([sim.player.x, sim.player.y, timer_manager.get_loop_tick(), timer_manager.current_loop - 1]
+            + [int(trigger.is_active) for trigger in triggers] + [int(gate.is_open) for gate in level.gates])
+
+class VectorEnvTest(unittest.TestCase):
+    def test_matches_simulation_tick_for_tick(self):
+        for path in LevelManager().level_paths:
+            with self.subTest(level=path):
+                sims = [Simulation(LevelManager.from_levels([load_level(path)])) for _ in SEEDS]
+                pilots = [RandomPilot(seed, sim.get_current_level(), 0.7, 0.1) for seed, sim in zip(SEEDS, sims)]
+                env = VectorEnv(load_level(path), len(sims), auto_reset=False)
+                observations = env.observations()
+                for sim, observation in zip(sims, observations):
+                    self.assertEqual(observation.tolist(), sim_state(sim))
+
+                for tick in range(env.loop_ticks * env.max_loops):
+                    if all(sim.state != "playing" for sim in sims):
+                        break
+                    entries = [pilot.next(sim.player) for pilot, sim in zip(pilots, sims)]
+                    observations, _, dones = env.step([direction for direction, _ in entries],
+                                                      np.array([interact for _, interact in entries]))
+                    for index, (sim, (direction, interact)) in enumerate(zip(sims, entries)):
+                        if sim.state != "playing":
+                            continue
+                        sim.step(direction, interact)
+                        self.assertEqual(bool(dones[index]), sim.state != "playing", f"env {index} tick {tick}")
+                        # Game over leaves the Simulation on the last tick of the loop
+                        if sim.state != "game_over":
+                            self.assertEqual(observations[index].tolist(), sim_state(sim),
+                                             f"env {index} tick {tick}")
+
+if __name__ == "__main__":
+    unittest.main()
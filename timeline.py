@@ -0,0 +1,140 @@
+"""Echo effects on a level's triggers, compiled ahead of time.
+
+Once a loop is over its echo's whole path is known, and so is everything it
+will do to the level's triggers: which pressure plates it steps on and off at
+which ticks, and which switches and terminals its interactions reach. The
+`TriggerTimeline` works this out once per echo against the level's fixed
+geometry and merges it into two tick-sorted schedules. Each tick then only
+applies the events that fall due, keeping a count of echoes on every plate,
+and the live player is the only body still tested against the plates.
+"""
+from typing import List, Set, Tuple
+
+import numpy as np
+
+from playback import EchoPlayback
+from spatial_np import rect_array, overlaps
+
+# Trigger Timeline class
+class TriggerTimeline:
+    def __init__(self, level):
+        self.level = level
+        self.plates = level.pressure_plates
+        self.plate_rects = rect_array(self.plates)
+        # What an interaction can reach, in the order Level lists them
+        self.latchables = [obj for obj in level.get_interactive_objects() if obj not in self.plates]
+        self.latchable_rects = rect_array(self.latchables)
+        self.plate_indices = {id(plate): index for index, plate in enumerate(self.plates)}
+
+        # Echoes on each plate before a loop's first tick, when they stand at
+        # their starts
+        self.rest_counts = np.zeros(len(self.plates), dtype=np.int64)
+
+        # Plate events: at tick t, `plate` gains (+1) or loses (-1) an echo
+        self.event_ticks = np.empty(0, dtype=np.int64)
+        self.event_plates = np.empty(0, dtype=np.int64)
+        self.event_deltas = np.empty(0, dtype=np.int64)
+
+        # Interaction events: at tick t, an echo activates `latchable`
+        self.interact_ticks = np.empty(0, dtype=np.int64)
+        self.interact_targets = np.empty(0, dtype=np.int64)
+
+        self.rewind()
+
+    def add(self, playback: EchoPlayback, index: int, width: int, height: int):
+        """Compile the effects of echo `index`, a body of width x height"""
+        # From its settle tick on the echo stays put, so nothing changes after it
+        ticks = playback.settle_tick(index) + 1
+        path = np.concatenate((playback.starts[index:index + 1], playback.trajectory(index, ticks)))
+
+        # Row 0 is the start, row t + 1 is the position at tick t
+        on_plate = overlaps(path[:, 0], path[:, 1], width, height, self.plate_rects)
+        rows, plates = np.nonzero(on_plate[1:] != on_plate[:-1])
+        deltas = np.where(on_plate[rows + 1, plates], 1, -1)
+        self.rest_counts = self.rest_counts + on_plate[0]
+        self.event_ticks, self.event_plates, self.event_deltas = merge(
+            self.event_ticks, rows, (self.event_plates, plates), (self.event_deltas, deltas))
+
+        ticks, positions = playback.interactions(index)
+        hits, targets = np.nonzero(overlaps(positions[:, 0], positions[:, 1], width, height, self.latchable_rects))
+        self.interact_ticks, self.interact_targets = merge(
+            self.interact_ticks, ticks[hits], (self.interact_targets, targets))
+
+        self.rewind()
+
+    def rewind(self):
+        """Back to the start of a loop"""
+        self.seek(-1)
+
+    def seek(self, loop_tick: int):
+        """Counts as they were after the update for `loop_tick`, with every plate due a recheck"""
+        self.cursor = int(np.searchsorted(self.event_ticks, loop_tick, side="right"))
+        self.interact_cursor = int(np.searchsorted(self.interact_ticks, loop_tick, side="right"))
+        counts = self.rest_counts.copy()
+        np.add.at(counts, self.event_plates[:self.cursor], self.event_deltas[:self.cursor])
+        self.counts: List[int] = counts.tolist()
+        self.touched: Set[int] = set(range(len(self.plates)))
+        self.player_pressed: Set[int] = set()
+
+    def update(self, loop_tick: int):
+        """Apply the events due by `loop_tick`: activate what the echoes interact with
+        and count them onto and off the plates"""
+        end = int(np.searchsorted(self.interact_ticks, loop_tick, side="right"))
+        if end != self.interact_cursor:
+            latchables = self.latchables
+            for target in self.interact_targets[self.interact_cursor:end].tolist():
+                latchables[target].activate()
+            self.interact_cursor = end
+
+        end = int(np.searchsorted(self.event_ticks, loop_tick, side="right"))
+        if end != self.cursor:
+            counts = self.counts
+            touched = self.touched
+            for plate, delta in zip(self.event_plates[self.cursor:end].tolist(),
+                                    self.event_deltas[self.cursor:end].tolist()):
+                counts[plate] += delta
+                touched.add(plate)
+            self.cursor = end
+
+    def update_plates(self, pressed: Set[int]):
+        """Set the plates whose echo count or player contact changed.
+
+        `pressed` holds the ids of the triggers the player is on.
+        """
+        touched = self.touched
+        plate_indices = self.plate_indices
+        for plate_id in pressed.symmetric_difference(self.player_pressed):
+            index = plate_indices.get(plate_id)
+            if index is not None:
+                touched.add(index)
+
+        plates, counts = self.plates, self.counts
+        for index in touched:
+            plate = plates[index]
+            plate.set_active(counts[index] > 0 or id(plate) in pressed)
+        touched.clear()
+        self.player_pressed = pressed
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.state())
+
+    def state(self) -> Tuple:
+        """The compiled schedules, for a snapshot; like EchoPlayback's, they are never modified in place"""
+        return (self.rest_counts, self.event_ticks, self.event_plates, self.event_deltas,
+                self.interact_ticks, self.interact_targets)
+
+    def restore(self, state: Tuple, loop_tick: int):
+        (self.rest_counts, self.event_ticks, self.event_plates, self.event_deltas,
+         self.interact_ticks, self.interact_targets) = state
+        self.seek(loop_tick)
+
+def merge(ticks: np.ndarray, new_ticks: np.ndarray, *columns) -> Tuple[np.ndarray, ...]:
+    """Merge new events into a tick-sorted schedule; `columns` are (old, new) pairs.
+
+    The sort is stable, so events of the same tick keep the order of the
+    echoes that produced them.
+    """
+    merged = np.concatenate((ticks, new_ticks)).astype(np.int64)
+    order = np.argsort(merged, kind="stable")
+    return (merged[order], *(np.concatenate((old, new)).astype(np.int64)[order] for old, new in columns))
@@ -0,0 +1,183 @@
+"""Batched environments for automated players.
+
+`VectorEnv` holds N independent copies of one level. Player positions, loop
+clocks, latched switches/terminals, gate states and every recorded loop live
+in NumPy arrays, and `step` advances all copies by one tick with a single
+call. The rules follow `Simulation.step` tick for tick: interact, move
+(blocked by walls and by the gates that were closed after the previous tick),
+echoes replaying earlier loops, plates, gates and the exit check, then the
+loop clock. Collision, plate occupancy and exit checks are rectangle tests
+broadcast over every environment at once.
+
+Echoes are not separate objects here: the position of the echo of loop e at
+tick t is simply where the player was after tick t of loop e, which is read
+straight out of the recorded trajectories.
+"""
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from simulation import FPS, LOOP_DURATION, Direction, Level, Player, TickClock
+from spatial_np import rect_array, overlaps
+
+# Movement per Direction value: NONE, UP, DOWN, LEFT, RIGHT
+DIRECTION_DX = np.array([0, 0, 0, -1, 1], dtype=np.int32)
+DIRECTION_DY = np.array([0, -1, 1, 0, 0], dtype=np.int32)
+
+COMPLETE_REWARD = 1.0
+GAME_OVER_REWARD = -1.0
+
+# Vector Env class
+class VectorEnv:
+    """N copies of a level stepped together.
+
+    Observations are an (N, 4 + triggers + gates) int32 array: player x, y,
+    loop tick, loop index, then 0/1 for every trigger (plates, then switches,
+    then terminals) and every gate being active or open.
+    """
+
+    def __init__(self, level: Level, num_envs: int, auto_reset: bool = True):
+        self.level = level
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.loop_ticks = TickClock(FPS).to_ticks(LOOP_DURATION)
+        self.max_loops = level.max_loops
+
+        probe = Player(*level.player_start)
+        self.start = level.player_start
+        self.width, self.height, self.speed = probe.width, probe.height, probe.speed
+
+        self.walls = rect_array(level.walls)
+        self.gates = rect_array(level.gates)
+        self.plates = rect_array(level.pressure_plates)
+        latchables = level.switches + level.terminals
+        self.latchables = rect_array(latchables)
+        self.exit = rect_array([level.exit] if level.exit else [])
+
+        # trigger -> gate table; a gate is open while any of its triggers is active
+        triggers = level.pressure_plates + latchables
+        self.trigger_gates = np.array([[t.target_id == g.gate_id for g in level.gates] for t in triggers],
+                                      dtype=np.int32).reshape(len(triggers), len(level.gates))
+
+        n = num_envs
+        # Every loop but the last can become an echo, so only those are recorded
+        echo_loops = max(0, self.max_loops - 1)
+        self.trajectories = np.zeros((n, echo_loops, self.loop_ticks, 2), dtype=np.int16)
+        # Switches and terminals each loop's player had latched by every tick
+        self.loop_latches = np.zeros((n, echo_loops, self.loop_ticks, len(latchables)), dtype=bool)
+
+        self.x = np.zeros(n, dtype=np.int32)
+        self.y = np.zeros(n, dtype=np.int32)
+        self.loop_tick = np.zeros(n, dtype=np.int32)
+        self.loop = np.zeros(n, dtype=np.int32)
+        self.latched = np.zeros((n, len(latchables)), dtype=bool)
+        self.active = np.zeros((n, len(triggers)), dtype=bool)
+        self.gate_open = np.zeros((n, len(level.gates)), dtype=bool)
+        self.done = np.zeros(n, dtype=bool)
+        self.reset()
+
+    @property
+    def observation_size(self) -> int:
+        return 4 + self.active.shape[1] + self.gate_open.shape[1]
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Restart the environments in `mask` (all by default) from the level start"""
+        mask = np.ones(self.num_envs, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self.loop[mask] = 0
+        self.trajectories[mask] = 0
+        self.loop_latches[mask] = False
+        self.done[mask] = False
+        self.start_loop(mask)
+        return self.observations()
+
+    def start_loop(self, mask: np.ndarray):
+        """Put everyone in `mask` back on the start, like Simulation.reset_loop"""
+        self.x[mask], self.y[mask] = self.start
+        self.loop_tick[mask] = 0
+        self.latched[mask] = False
+        # Plates settle on where everyone starts (echoes start there too)
+        on_plates = overlaps(np.array(self.start[0]), np.array(self.start[1]), self.width, self.height, self.plates)
+        active = np.zeros(self.active.shape[1], dtype=bool)
+        active[:len(on_plates)] = on_plates
+        self.active[mask] = active
+        self.gate_open[mask] = (active.astype(np.int32) @ self.trigger_gates) > 0
+
+    def observations(self) -> np.ndarray:
+        return np.concatenate((self.x[:, None], self.y[:, None], self.loop_tick[:, None], self.loop[:, None],
+                               self.active, self.gate_open), axis=1).astype(np.int32)
+
+    def step(self, actions: Union[np.ndarray, Sequence[Direction]],
+             interact: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Advance every environment one tick.
+
+        `actions` holds one Direction (or its value) per environment and
+        `interact` optional per-environment interact flags. Returns
+        (observations, rewards, dones); with auto_reset, finished environments
+        start over and the returned observation is already the new start.
+        """
+        actions = np.asarray([a.value if isinstance(a, Direction) else a for a in actions], dtype=np.int64)
+        running = ~self.done
+        envs = np.arange(self.num_envs)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        t = self.loop_tick
+        recording = running & (self.loop < self.trajectories.shape[1])
+
+        # Interact: latch the switches and terminals the player stands on
+        if interact is not None and self.latchables.size:
+            hits = overlaps(self.x, self.y, self.width, self.height, self.latchables)
+            self.latched |= hits & (np.asarray(interact, dtype=bool) & running)[:, None]
+
+        # Move unless the new position hits a wall or a gate closed after the last tick
+        nx = self.x + DIRECTION_DX[actions] * self.speed
+        ny = self.y + DIRECTION_DY[actions] * self.speed
+        blocked = overlaps(nx, ny, self.width, self.height, self.walls).any(axis=1)
+        blocked |= (overlaps(nx, ny, self.width, self.height, self.gates) & ~self.gate_open).any(axis=1)
+        moving = running & (actions != Direction.NONE.value) & ~blocked
+        self.x = np.where(moving, np.clip(nx, 0, self.level.width - self.width), self.x).astype(np.int32)
+        self.y = np.where(moving, np.clip(ny, 0, self.level.height - self.height), self.y).astype(np.int32)
+
+        rec = envs[recording]
+        self.trajectories[rec, self.loop[rec], t[rec], 0] = self.x[rec]
+        self.trajectories[rec, self.loop[rec], t[rec], 1] = self.y[rec]
+        # Latches are kept for the whole loop, so each tick records everything latched so far
+        self.loop_latches[rec, self.loop[rec], t[rec]] = self.latched[rec]
+
+        # Echoes of earlier loops: where the player was at this tick and what it had latched by then
+        echo_loops = self.trajectories.shape[1]
+        replaying = np.arange(echo_loops)[None, :] < self.loop[:, None]  # (N, echoes)
+        echo_positions = self.trajectories[envs, :, np.minimum(t, self.loop_ticks - 1)]  # (N, echoes, 2)
+
+        plates = overlaps(self.x, self.y, self.width, self.height, self.plates)
+        if echo_loops and self.plates.size:
+            echo_plates = overlaps(echo_positions[..., 0].astype(np.int32), echo_positions[..., 1].astype(np.int32),
+                                   self.width, self.height, self.plates)
+            plates |= (echo_plates & replaying[..., None]).any(axis=1)
+
+        latched = self.latched
+        if echo_loops and self.latchables.size:
+            echo_latched = self.loop_latches[envs, :, np.minimum(t, self.loop_ticks - 1)]  # (N, echoes, latchables)
+            latched = latched | (echo_latched & replaying[..., None]).any(axis=1)
+
+        active = np.concatenate((plates, latched), axis=1)
+        self.active = np.where(running[:, None], active, self.active)
+        gate_open = (self.active.astype(np.int32) @ self.trigger_gates) > 0
+        self.gate_open = np.where(running[:, None], gate_open, self.gate_open)
+
+        # Exit
+        completed = running & overlaps(self.x, self.y, self.width, self.height, self.exit).any(axis=1)
+        rewards[completed] = COMPLETE_REWARD
+
+        # Loop clock
+        ticking = running & ~completed
+        self.loop_tick[ticking] += 1
+        resetting = ticking & (self.loop_tick >= self.loop_ticks)
+        self.loop[resetting] += 1
+        game_over = resetting & (self.loop >= self.max_loops)
+        rewards[game_over] = GAME_OVER_REWARD
+        self.start_loop(resetting & ~game_over)
+
+        dones = completed | game_over
+        self.done |= dones
+        if self.auto_reset and dones.any():
+            self.reset(dones)
+        return self.observations(), rewards, dones